@@ -0,0 +1,31 @@
+"""Client geo index
+
+Revision ID: 8b1f0c2d4e6a
+Revises: 606d7703135f
+Create Date: 2024-11-05 12:10:41.502318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1f0c2d4e6a"
+down_revision: Union[str, None] = "606d7703135f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_clients_latitude_longitude",
+        "clients",
+        ["latitude", "longitude"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clients_latitude_longitude", table_name="clients")
@@ -0,0 +1,41 @@
+"""Client sort indexes
+
+Revision ID: 2c9d7e41a5b3
+Revises: 8b1f0c2d4e6a
+Create Date: 2024-11-06 10:42:17.118904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c9d7e41a5b3"
+down_revision: Union[str, None] = "8b1f0c2d4e6a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_clients_creation_date_id",
+        "clients",
+        ["creation_date", "id"],
+        unique=False,
+    )
+    op.create_index("ix_clients_name_id", "clients", ["name", "id"], unique=False)
+    op.create_index(
+        "ix_clients_surname_id",
+        "clients",
+        [sa.text("coalesce(surname, '')"), "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clients_surname_id", table_name="clients")
+    op.drop_index("ix_clients_name_id", table_name="clients")
+    op.drop_index("ix_clients_creation_date_id", table_name="clients")
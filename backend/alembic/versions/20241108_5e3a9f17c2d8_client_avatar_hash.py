@@ -0,0 +1,29 @@
+"""Client avatar hash
+
+Revision ID: 5e3a9f17c2d8
+Revises: 2c9d7e41a5b3
+Create Date: 2024-11-08 14:05:52.730116
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e3a9f17c2d8"
+down_revision: Union[str, None] = "2c9d7e41a5b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "clients", sa.Column("avatar_hash", sa.String(length=64), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("clients", "avatar_hash")
@@ -0,0 +1,27 @@
+"""Client avatar renditions
+
+Revision ID: 9a4c6b2e8f13
+Revises: 5e3a9f17c2d8
+Create Date: 2024-11-11 16:21:09.447382
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4c6b2e8f13"
+down_revision: Union[str, None] = "5e3a9f17c2d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("clients", sa.Column("avatar_renditions", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("clients", "avatar_renditions")
@@ -0,0 +1,37 @@
+"""Client avatar status
+
+Revision ID: d1f7a3c95b24
+Revises: 9a4c6b2e8f13
+Create Date: 2024-11-13 11:38:26.904153
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d1f7a3c95b24"
+down_revision: Union[str, None] = "9a4c6b2e8f13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+avatar_status_enum = sa.Enum("pending", "ready", "failed", name="avatarstatusenum")
+
+
+def upgrade() -> None:
+    avatar_status_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "clients",
+        sa.Column("avatar_source_hash", sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        "clients", sa.Column("avatar_status", avatar_status_enum, nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("clients", "avatar_status")
+    op.drop_column("clients", "avatar_source_hash")
+    avatar_status_enum.drop(op.get_bind(), checkfirst=True)
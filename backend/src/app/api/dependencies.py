@@ -0,0 +1,26 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from src.app.utils.tokens import token_manager
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+async def get_current_client_id(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> int:
+    """id клиента из access-токена в заголовке Authorization: Bearer."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Требуется авторизация.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return token_manager.verify(credentials.credentials)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -3,9 +3,11 @@ from fastapi import APIRouter
 from src.app_config.config_api import settings
 
 from .v1.client import router as client
+from .v1.metrics import router as metrics
 
 
 router = APIRouter(prefix=settings.APP_PREFIX)
 
 
 router.include_router(client)
+router.include_router(metrics)
@@ -1,14 +1,36 @@
-from fastapi import APIRouter, File, UploadFile, Form, status, HTTPException, Query
-from starlette.responses import JSONResponse, StreamingResponse
-import io
+from fastapi import (
+    APIRouter,
+    File,
+    UploadFile,
+    Form,
+    Depends,
+    status,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from starlette.responses import FileResponse, JSONResponse
+import os
 
-from src.app.schemas.client import AuthResponse, ClientData, ClientResponse
+from src.app.repositories.exceptions import AvatarNotReadyException
+from src.app.api.dependencies import get_current_client_id
+from src.app.schemas.client import (
+    AuthResponse,
+    ClientData,
+    ClientResponse,
+    TokenResponse,
+)
 from src.app.schemas.enums import GenderEnum
+from src.app.services.avatar import AvatarService
 from src.app.services.client import ClientService
 from src.app.services.like import LikeService
 from src.app.schemas.like import LikeResponse
 from src.app.utils.geocoding import geocoding_service
-from src.app.utils.calc_dist import distance_calculator
+from src.app.utils.blob_store import blob_store
+from src.app.utils.http_cache import format_http_date, is_not_modified, make_etag
+from src.app.utils.image_processor import ImageProcessor
+from src.app_config.app_settings import app_settings
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -28,29 +50,48 @@ async def register(
     password: str = Form(..., description="Пароль"),
     city: str = Form(..., description="Город"),
 ):
-    avatar_content = await avatar.read() if avatar else None
-
     try:
         latitude, longitude = await geocoding_service.get_coordinates(city)
+        # Проверки до сохранения файла: отклонённая регистрация не оставляет его
+        await ClientService.ensure_email_available(email)
     except ValueError as e:
         return JSONResponse(
             status_code=400,
             content={"detail": str(e)},
         )
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
 
-    user = ClientData(
-        name=name,
-        surname=surname,
-        email=email,
-        gender=gender,
-        avatar=avatar_content,
-        password=password,
-        latitude=latitude,
-        longitude=longitude,
-    )
+    avatar_source_hash = None
+    avatar_slot = None
+    if avatar:
+        try:
+            # Место в очереди занимается до чтения файла: при перегрузке
+            # загрузка не принимается
+            avatar_slot = await AvatarService.reserve_slot()
+            avatar_source_hash = await AvatarService.store_upload(avatar)
+        except HTTPException as e:
+            await AvatarService.release_slot(avatar_slot)
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+                headers=e.headers,
+            )
 
     try:
-        created_user = await ClientService.create(user)
+        user = ClientData(
+            name=name,
+            surname=surname,
+            email=email,
+            gender=gender,
+            avatar_source_hash=avatar_source_hash,
+            password=password,
+            latitude=latitude,
+            longitude=longitude,
+        )
+        created_user = await ClientService.create(user, avatar_slot=avatar_slot)
+        # Слот теперь у задачи обработки
+        avatar_slot = None
         response_data = {
             "id": created_user["id"],
             "name": created_user["name"],
@@ -61,9 +102,16 @@ async def register(
             "longitude": created_user["longitude"],
         }
         return JSONResponse(content=response_data, status_code=status.HTTP_201_CREATED)
-    except HTTPException as e:
-        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
+        if avatar_source_hash:
+            await AvatarService.discard_upload(avatar_source_hash)
+        await AvatarService.release_slot(avatar_slot)
+        if isinstance(e, HTTPException):
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+                headers=e.headers,
+            )
         return JSONResponse(
             status_code=500,
             content={
@@ -77,9 +125,65 @@ async def register(
     status_code=status.HTTP_200_OK,
     description="Получить аватар пользователя",
 )
-async def get_avatar(client_id: int):
-    avatar_content = await ClientService.get_avatar(client_id)
-    return StreamingResponse(io.BytesIO(avatar_content), media_type="image/jpeg")
+async def get_avatar(
+    client_id: int,
+    request: Request,
+    size: int = Query(
+        None, ge=1, description="Желаемый размер в пикселях (64, 256, 1024)"
+    ),
+):
+    try:
+        avatar_hash = await ClientService.get_avatar_hash(
+            client_id, size=size, accept=request.headers.get("accept")
+        )
+    except AvatarNotReadyException:
+        # Аватар ещё в очереди на обработку: заглушка не кэшируется
+        return Response(
+            ImageProcessor.placeholder(),
+            media_type="image/png",
+            headers={"Cache-Control": "no-cache"},
+        )
+    if avatar_hash is None:
+        # Аватар ещё хранится в таблице clients (не перенесён в blob_store)
+        avatar_content = await ClientService.get_avatar(client_id)
+        headers = avatar_cache_headers(blob_store.content_hash(avatar_content))
+        if is_not_modified(request.headers, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        media_type = ImageProcessor.detect_media_type(avatar_content)
+        return Response(avatar_content, media_type=media_type, headers=headers)
+
+    headers = avatar_cache_headers(avatar_hash)
+    if size is not None:
+        # Формат копии зависит от Accept
+        headers["Vary"] = "Accept"
+    # Совпадение ETag проверяется до обращения к файлу
+    if is_not_modified(request.headers, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = blob_store.local_path(avatar_hash)
+    if path is None:
+        raise HTTPException(
+            status_code=404, detail="Не найдена аватарка или нет такого клиента."
+        )
+    stat_result = os.stat(path)
+    headers["Last-Modified"] = format_http_date(stat_result.st_mtime)
+    if is_not_modified(request.headers, headers["ETag"], stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    with open(path, "rb") as file:
+        media_type = ImageProcessor.detect_media_type(file.read(16))
+    # Файл отдаётся с диска (pathsend/sendfile, если сервер поддерживает)
+    return FileResponse(
+        path, media_type=media_type, headers=headers, stat_result=stat_result
+    )
+
+
+def avatar_cache_headers(avatar_hash: str) -> dict:
+    # Содержимое по хэшу не меняется, поэтому кэш может жить долго
+    return {
+        "ETag": make_etag(avatar_hash),
+        "Cache-Control": f"public, max-age={app_settings.AVATAR_CACHE_MAX_AGE}, immutable",
+    }
 
 
 @router.post(
@@ -104,18 +208,31 @@ async def login(
         )
 
 
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+    status_code=status.HTTP_200_OK,
+    description="Новая пара токенов по refresh-токену",
+)
+async def refresh(refresh_token: str = Form(..., description="Refresh-токен")):
+    try:
+        tokens = ClientService.refresh_tokens(refresh_token)
+        return JSONResponse(content=tokens, status_code=status.HTTP_200_OK)
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+
+
 @router.post(
     "/{id}/match",
     response_model=LikeResponse,
     status_code=status.HTTP_200_OK,
     description="Оценивание участником другого участника",
 )
-async def match_participant(id: int, current_user_id: int = Form(...)):
+async def match_participant(
+    id: int, current_user_id: int = Depends(get_current_client_id)
+):
     try:
-        if await LikeService.check_daily_limit(current_user_id):
-            raise HTTPException(status_code=400, detail="Лимит Лайков.")
-
-        await LikeService.create_like(current_user_id, id)
+        await LikeService.create_like_with_limit(current_user_id, id)
         mutual_like = await ClientService.check_mutual_like(current_user_id, id)
 
         if mutual_like:
@@ -147,6 +264,7 @@ async def match_participant(id: int, current_user_id: int = Form(...)):
     description="Получить список участников с возможностью фильтрации и сортировки",
 )
 async def list_clients(
+    response: Response,
     name: str = Query(None, description="Имя для фильтрации"),
     surname: str = Query(None, description="Фамилия для фильтрации"),
     gender: GenderEnum = Query(None, description="Пол для фильтрации"),
@@ -156,6 +274,10 @@ async def list_clients(
     sort_order: str = Query("asc", description="Порядок сортировки (asc, desc)"),
     city: str = Query(None, description="Город для фильтрации"),
     distance: float = Query(None, description="Максимальное расстояние в километрах"),
+    cursor: str = Query(
+        None, description="Курсор следующей страницы из заголовка X-Next-Cursor"
+    ),
+    limit: int = Query(None, ge=1, description="Размер страницы"),
 ):
     user_location = None
     try:
@@ -163,36 +285,23 @@ async def list_clients(
             latitude, longitude = await geocoding_service.get_coordinates(city)
             user_location = (latitude, longitude)
 
-        # Получаем список клиентов
-        clients = await ClientService.get_all_clients(
+        # Получаем страницу клиентов
+        clients, next_cursor = await ClientService.get_all_clients(
             name=name,
             surname=surname,
             gender=gender,
             sort_by=sort_by,
             sort_order=sort_order,
+            user_location=user_location,
+            distance=distance,
+            cursor=cursor,
+            limit=limit,
         )
-
-        if user_location:
-            filtered_clients = []
-            # Создаем список координат для вычисления расстояний
-            locations = [
-                (
-                    user_location[0],
-                    user_location[1],
-                    client["latitude"],
-                    client["longitude"],
-                )
-                for client in clients
-            ]
-            distances = await distance_calculator.calculate_distances(locations)
-
-            for client, client_distance in zip(clients, distances):
-                if client_distance <= distance:
-                    filtered_clients.append(client)
-
-            return filtered_clients
-
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return clients
+    except HTTPException as e:
+        raise e
     except Exception as e:
         return JSONResponse(
             content={"detail": str(e)},
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, status
+
+from src.app.utils.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    description="Счётчики и тайминги текущего процесса",
+)
+async def get_metrics():
+    return metrics.snapshot()
@@ -1,17 +1,33 @@
-from sqlalchemy import Integer, LargeBinary, String, Float
-from src.app.schemas.enums import GenderEnum
+from sqlalchemy import Index, Integer, LargeBinary, String, Float, func, literal_column
+from src.app.schemas.enums import AvatarStatusEnum, GenderEnum
 from src.app.models.mixin import CreationDateMixin, IsActiveMixin
 from src.database.database_metadata import Base
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import Enum as SQLAlchemyEnum
-from typing import Optional
+from typing import Any, Optional
 
 
 class ClientORM(Base, IsActiveMixin, CreationDateMixin):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_latitude_longitude", "latitude", "longitude"),
+        # Индексы сортировки списка (поле, id), см. ClientService.sort_columns
+        Index("ix_clients_creation_date_id", "creation_date", "id"),
+        Index("ix_clients_name_id", "name", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    avatar: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    # Аватар не читается вместе со строкой; загружать явно (ClientRepository.get_avatar)
+    avatar: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True)
+    # sha256 аватара в blob_store; avatar заполнен только у ещё не перенесённых строк
+    avatar_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Уменьшенные копии: "<размер>.<формат>" -> sha256 в blob_store
+    avatar_renditions: Mapped[Optional[dict[str, Any]]] = mapped_column(nullable=True)
+    # Исходный загруженный файл, ждущий фоновой обработки
+    avatar_source_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    avatar_status: Mapped[Optional[AvatarStatusEnum]] = mapped_column(
+        SQLAlchemyEnum(AvatarStatusEnum), nullable=True
+    )
     gender: Mapped[Optional[GenderEnum]] = mapped_column(SQLAlchemyEnum(GenderEnum))
     name: Mapped[str] = mapped_column(String, nullable=False)
     surname: Mapped[Optional[str]] = mapped_column(String)
@@ -27,6 +43,13 @@ class ClientORM(Base, IsActiveMixin, CreationDateMixin):
             "surname": self.surname,
             "email": self.email,
             "gender": self.gender,
-            "avatar": self.avatar,
             "creation_date": self.creation_date,
         }
+
+
+# Сортировка по фамилии идёт по coalesce(surname, ''), см. ClientService.sort_columns
+Index(
+    "ix_clients_surname_id",
+    func.coalesce(ClientORM.surname, literal_column("''")),
+    ClientORM.id,
+)
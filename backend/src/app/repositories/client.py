@@ -1,12 +1,31 @@
 from sqlalchemy import select
 from src.app.models.client import ClientORM
+from src.app.schemas.enums import AvatarStatusEnum
 from sqlalchemy import exc
 from src.app.utils.repository import SQLAlchemyRepository
-import bcrypt
 
 
 class ClientRepository(SQLAlchemyRepository):
     model = ClientORM
+    # Колонки, которые отдаются в списках; аватар (LargeBinary) сюда не входит
+    summary_columns = (
+        ClientORM.id,
+        ClientORM.name,
+        ClientORM.surname,
+        ClientORM.email,
+        ClientORM.gender,
+        ClientORM.latitude,
+        ClientORM.longitude,
+        ClientORM.creation_date,
+    )
+    credential_columns = (
+        ClientORM.id,
+        ClientORM.name,
+        ClientORM.surname,
+        ClientORM.email,
+        ClientORM.gender,
+        ClientORM.password,
+    )
 
     async def get_by_email(self, email: str) -> ClientORM | None:
         stmt = select(self.model).where(self.model.email == email)
@@ -16,10 +35,63 @@ class ClientRepository(SQLAlchemyRepository):
         except exc.NoResultFound:
             return None
 
-    async def authenticate(self, email: str, password: str) -> ClientORM | None:
-        client = await self.get_by_email(email)
-        if client and bcrypt.checkpw(
-            password.encode("utf-8"), client.password.encode("utf-8")
-        ):
-            return client
-        return None
+    async def get_locations(self, after_id: int = 0) -> list:
+        stmt = (
+            select(
+                self.model.id,
+                self.model.latitude,
+                self.model.longitude,
+                self.model.gender,
+            )
+            .where(self.model.id > after_id)
+            .order_by(self.model.id)
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    async def email_exists(self, email: str) -> bool:
+        stmt = select(self.model.id).where(self.model.email == email).limit(1)
+        res = await self.session.execute(stmt)
+        return res.first() is not None
+
+    async def get_credentials_by_email(self, email: str):
+        stmt = select(*self.credential_columns).where(self.model.email == email)
+        res = await self.session.execute(stmt)
+        return res.first()
+
+    async def get_contact_by_id(self, id: int):
+        stmt = select(self.model.id, self.model.name, self.model.email).where(
+            self.model.id == id
+        )
+        res = await self.session.execute(stmt)
+        return res.first()
+
+    async def get_avatar_refs(self, id: int):
+        stmt = select(
+            self.model.avatar_hash,
+            self.model.avatar_renditions,
+            self.model.avatar_status,
+        ).where(self.model.id == id)
+        res = await self.session.execute(stmt)
+        return res.first()
+
+    async def get_pending_avatars(self) -> list:
+        stmt = select(self.model.id, self.model.avatar_source_hash).where(
+            self.model.avatar_status == AvatarStatusEnum.pending
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    async def source_in_use(self, source_hash: str) -> bool:
+        stmt = (
+            select(self.model.id)
+            .where(self.model.avatar_source_hash == source_hash)
+            .limit(1)
+        )
+        res = await self.session.execute(stmt)
+        return res.first() is not None
+
+    async def get_avatar(self, id: int) -> bytes | None:
+        stmt = select(self.model.avatar).where(self.model.id == id)
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none()
@@ -33,3 +33,35 @@ class UnavailableEmailException(HTTPException):
             status_code=status.HTTP_409_CONFLICT,
             detail="email is not available",
         )
+
+
+class AvatarNotReadyException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Аватар ещё обрабатывается.",
+        )
+
+
+class AvatarQueueFullException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис перегружен, повторите попытку позже.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AvatarTooLargeException(HTTPException):
+    def __init__(self, detail: str = "Слишком большой файл аватара."):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail
+        )
+
+
+class AvatarFormatException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Аватар должен быть изображением PNG, JPEG, WebP или GIF.",
+        )
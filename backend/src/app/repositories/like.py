@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import List
 
 from sqlalchemy import func, select
 from src.app.models.like import LikeORM
@@ -22,3 +23,10 @@ class LikeRepository(SQLAlchemyRepository):
         )
         result = await self.session.execute(query)
         return result.scalar()
+
+    async def get_creation_dates(self, user_id: int, since: date) -> List[date]:
+        query = select(LikeORM.creation_date).where(
+            LikeORM.user_id == user_id, LikeORM.creation_date >= since
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
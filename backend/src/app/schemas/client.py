@@ -17,7 +17,7 @@ class ClientFullData(BaseModel):
 
 
 class ClientData(BaseModel):
-    avatar: Optional[bytes] = None
+    avatar_source_hash: Optional[str] = None
     gender: Optional[GenderEnum]
     name: str
     surname: Optional[str]
@@ -30,7 +30,13 @@ class ClientData(BaseModel):
         from_attributes = True
 
 
-class AuthResponse(BaseModel):
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
+class AuthResponse(TokenResponse):
     id: int
     name: str
     surname: str
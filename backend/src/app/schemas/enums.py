@@ -5,3 +5,9 @@ class GenderEnum(str, Enum):
     male = "male"
     female = "female"
     other = "other"
+
+
+class AvatarStatusEnum(str, Enum):
+    pending = "pending"
+    ready = "ready"
+    failed = "failed"
@@ -0,0 +1,293 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from fastapi import UploadFile
+from PIL import Image
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.app_config.app_settings import app_settings
+from src.app_config.config_redis import RedisRepository
+from ..repositories.exceptions import (
+    AvatarFormatException,
+    AvatarQueueFullException,
+    AvatarTooLargeException,
+)
+from ..schemas.enums import AvatarStatusEnum
+from ..utils.blob_store import blob_store
+from ..utils.image_processor import ImageProcessor
+from ..utils.rate_limiter import SlidingWindowLimiter
+from ..utils.task_queue import LocalTaskQueue, RedisTaskQueue, TaskQueue
+from ..utils.unitofwork import IUnitOfWork, UnitOfWork
+
+# Слот семафора процесса (без Redis)
+LOCAL_SLOT = "local"
+
+
+class AvatarService:
+    """Фоновая обработка аватаров: водяной знак и копии строятся вне регистрации.
+
+    Место в очереди (слот) занимается до чтения загрузки и освобождается,
+    когда задача обработана: одновременно принимается не больше
+    AVATAR_QUEUE_DEPTH аватаров. С Redis слоты общие для всех процессов
+    (скользящее окно AVATAR_SLOT_LEASE секунд на случай, если процесс упал,
+    не вернув слот), без Redis - семафор процесса.
+    """
+
+    queue_name = "avatars:queue"
+    queue: TaskQueue = None
+    workers: List[asyncio.Task] = []
+    slots: Optional[SlidingWindowLimiter] = None
+    local_slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    async def start(
+        cls,
+        redis_repo: Optional[RedisRepository] = None,
+        concurrency: int = app_settings.AVATAR_WORKERS,
+    ) -> None:
+        # Без Redis задачи живут в памяти процесса
+        if redis_repo is not None:
+            cls.use_redis(redis_repo)
+        else:
+            cls.queue = LocalTaskQueue()
+        cls.workers = [asyncio.create_task(cls.worker()) for _ in range(concurrency)]
+        await cls.enqueue_pending()
+
+    @classmethod
+    def use_redis(cls, redis_repo: RedisRepository) -> None:
+        cls.queue = RedisTaskQueue(redis_repo, cls.queue_name)
+        cls.slots = SlidingWindowLimiter(
+            redis_repo,
+            prefix="avatars",
+            limit=app_settings.AVATAR_QUEUE_DEPTH,
+            window=app_settings.AVATAR_SLOT_LEASE,
+        )
+
+    @classmethod
+    async def stop(cls) -> None:
+        for task in cls.workers:
+            task.cancel()
+        await asyncio.gather(*cls.workers, return_exceptions=True)
+        cls.workers = []
+
+    @classmethod
+    async def attach_redis(cls, redis_repo: RedisRepository) -> None:
+        """Переводит очередь на Redis, если при старте он был недоступен.
+
+        Задачи из очереди в памяти переносятся в общую очередь.
+        """
+        if not isinstance(cls.queue, LocalTaskQueue):
+            return
+        local = cls.queue
+        cls.use_redis(redis_repo)
+        jobs = local.drain()
+        for index, job in enumerate(jobs):
+            try:
+                await cls.enqueue(job["client_id"], job["source_hash"], job["slot"])
+            except RedisError as e:
+                logger.warning(f"Avatar queue stays local: {e}")
+                # Слот этой задачи enqueue уже вернул
+                job["slot"] = None
+                for rest in jobs[index:]:
+                    await local.put(rest)
+                cls.queue, cls.slots = local, None
+                return
+
+    @classmethod
+    async def reserve_slot(cls) -> str:
+        """Занимает место в очереди или отклоняет аватар (503).
+
+        Проверка и учёт атомарны, поэтому всплеск одновременных загрузок не
+        проскакивает мимо лимита. Слот нужно вернуть через release_slot или
+        передать в enqueue.
+        """
+        if cls.slots is not None:
+            try:
+                slot = await cls.slots.acquire("slots", cls.no_history)
+            except RedisError as e:
+                logger.warning(f"Avatar slots are unavailable: {e}")
+            else:
+                if slot is None:
+                    raise AvatarQueueFullException(app_settings.AVATAR_RETRY_AFTER)
+                return slot
+        # Без Redis лимит действует в пределах процесса
+        if cls.local_slots is None:
+            cls.local_slots = asyncio.Semaphore(app_settings.AVATAR_QUEUE_DEPTH)
+        if cls.local_slots.locked():
+            raise AvatarQueueFullException(app_settings.AVATAR_RETRY_AFTER)
+        await cls.local_slots.acquire()
+        return LOCAL_SLOT
+
+    @classmethod
+    async def release_slot(cls, slot: Optional[str]) -> None:
+        if slot is None:
+            return
+        if slot == LOCAL_SLOT:
+            if cls.local_slots is not None:
+                cls.local_slots.release()
+            return
+        if cls.slots is not None:
+            try:
+                await cls.slots.release("slots", slot)
+            except RedisError as e:
+                # Слот выйдет из окна через AVATAR_SLOT_LEASE
+                logger.warning(f"Avatar slot was not released: {e}")
+
+    @staticmethod
+    async def no_history() -> list:
+        return []
+
+    @classmethod
+    async def store_upload(cls, upload: UploadFile) -> str:
+        """Сохраняет загруженный файл в blob_store и возвращает его хэш.
+
+        Файл копируется частями с ограничением AVATAR_MAX_BYTES, тип
+        определяется по первым байтам, а разрешение - по заголовку
+        изображения до декодирования пикселей.
+        """
+        if upload.size is not None and upload.size > app_settings.AVATAR_MAX_BYTES:
+            raise AvatarTooLargeException()
+        source_hash = await blob_store.put_stream(cls.read_upload(upload))
+        path = blob_store.local_path(source_hash)
+        if path is None:
+            return source_hash
+        try:
+            await asyncio.to_thread(ImageProcessor.read_dimensions, path)
+        except (ValueError, Image.DecompressionBombError) as e:
+            await blob_store.delete(source_hash)
+            raise AvatarTooLargeException(str(e))
+        except Exception:
+            # Сигнатура совпала, но Pillow не смог разобрать заголовок
+            await blob_store.delete(source_hash)
+            raise AvatarFormatException()
+        return source_hash
+
+    @classmethod
+    async def discard_upload(
+        cls, source_hash: str, uow: Optional[IUnitOfWork] = None
+    ) -> None:
+        """Удаляет исходный файл, если на него не ссылается ни один клиент.
+
+        Хранилище адресуется содержимым: тот же файл мог загрузить другой
+        клиент, и его аватар ещё ждёт обработки.
+        """
+        uow = uow or UnitOfWork()
+        try:
+            async with uow:
+                in_use = await uow.client.source_in_use(source_hash)
+            if not in_use:
+                await blob_store.delete(source_hash)
+        except Exception as e:
+            logger.warning(f"Avatar source {source_hash} was not removed: {e}")
+
+    @staticmethod
+    async def read_upload(
+        upload: UploadFile, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        size = 0
+        while chunk := await upload.read(chunk_size):
+            if size == 0 and ImageProcessor.detect_media_type(chunk) is None:
+                raise AvatarFormatException()
+            size += len(chunk)
+            if size > app_settings.AVATAR_MAX_BYTES:
+                raise AvatarTooLargeException()
+            yield chunk
+
+    @classmethod
+    async def enqueue(
+        cls, client_id: int, source_hash: str, slot: Optional[str] = None
+    ) -> None:
+        """Ставит аватар в очередь; слот освободит обработчик задачи."""
+        if cls.queue is None:
+            cls.queue = LocalTaskQueue()
+        if not cls.workers:
+            cls.workers = [asyncio.create_task(cls.worker())]
+        if slot == LOCAL_SLOT and not isinstance(cls.queue, LocalTaskQueue):
+            # Задачу из Redis может взять другой процесс: семафор этого
+            # процесса освобождается сразу
+            await cls.release_slot(slot)
+            slot = None
+        try:
+            await cls.queue.put(
+                {"client_id": client_id, "source_hash": source_hash, "slot": slot}
+            )
+        except Exception:
+            await cls.release_slot(slot)
+            raise
+
+    @classmethod
+    async def enqueue_pending(cls, uow: Optional[IUnitOfWork] = None) -> None:
+        """Возвращает в очередь аватары, не обработанные до перезапуска.
+
+        Повторная постановка безопасна: обработка идемпотентна.
+        """
+        uow = uow or UnitOfWork()
+        async with uow:
+            pending = await uow.client.get_pending_avatars()
+        for client_id, source_hash in pending:
+            await cls.queue.put({"client_id": client_id, "source_hash": source_hash})
+
+    @classmethod
+    async def worker(cls) -> None:
+        while True:
+            try:
+                job = await cls.queue.get(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Avatar queue is unavailable: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if job is None:
+                continue
+            try:
+                await cls.process(job["client_id"], job["source_hash"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Обработчик не должен умирать: аватар останется pending и
+                # вернётся в очередь через enqueue_pending
+                logger.warning(f"Avatar of client {job['client_id']} failed: {e}")
+            finally:
+                await cls.release_slot(job.get("slot"))
+
+    @classmethod
+    async def process(
+        cls, client_id: int, source_hash: str, uow: Optional[IUnitOfWork] = None
+    ) -> None:
+        # Импорт здесь: ClientService сам ставит задачи в эту очередь
+        from .client import ClientService
+
+        # Своя сессия на задачу: UnitOfWork хранит сессию в атрибуте, и
+        # общий экземпляр параллельные обработчики перезаписывали бы
+        uow = uow or UnitOfWork()
+
+        try:
+            # Процессу пула передаётся путь, а не содержимое файла
+            source = blob_store.local_path(source_hash) or await blob_store.get(
+                source_hash
+            )
+            if source is None:
+                raise ValueError(f"Avatar source {source_hash} is missing")
+            renditions = await ImageProcessor.process_avatar(source)
+            avatar_hash, avatar_renditions = await ClientService.store_avatar(
+                renditions
+            )
+            data = {
+                "avatar_hash": avatar_hash,
+                "avatar_renditions": avatar_renditions,
+                "avatar_status": AvatarStatusEnum.ready,
+                # Исходный файл больше не нужен
+                "avatar_source_hash": None,
+            }
+        except Exception as e:
+            logger.warning(f"Avatar of client {client_id} was not processed: {e}")
+            data = {"avatar_status": AvatarStatusEnum.failed}
+
+        async with uow:
+            await uow.client.edit_one(client_id, data)
+            await uow.commit()
+        if data["avatar_status"] == AvatarStatusEnum.ready:
+            await cls.discard_upload(source_hash, uow)
@@ -1,34 +1,116 @@
 from fastapi import HTTPException
+from loguru import logger
+from redis.exceptions import RedisError
 from src.app_config.config_redis import RedisRepository
+from src.redisrepo.dependencies import get_redis_repo
 from ..schemas.client import AuthResponse, ClientData, ClientFullData
 from ..utils.unitofwork import IUnitOfWork, UnitOfWork
+from ..repositories.client import ClientRepository
+from ..repositories.exceptions import AvatarNotReadyException
+from .avatar import AvatarService
 from ..utils.image_processor import ImageProcessor
-import bcrypt
-from sqlalchemy import select
+from ..utils.blob_store import blob_store
+from sqlalchemy import (
+    Integer,
+    any_,
+    bindparam,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from ..models.client import ClientORM
 from ..schemas.client import GenderEnum
-from geopy.distance import great_circle
+from ..schemas.enums import AvatarStatusEnum
+from ..utils.cache_loader import CacheLoader
+from ..utils.calc_dist import distance_calculator
+from ..utils.fingerprint import fingerprint, normalize_text, round_location
+from ..utils.local_cache import LocalCache
+from ..utils.spatial_index import spatial_index
+from ..utils.password_hasher import password_hasher
+from ..utils.tokens import REFRESH, token_manager
+from ..utils.pagination import SORT_FIELDS, SORT_ORDERS, decode_cursor, encode_cursor
+from src.app_config.app_settings import app_settings
+
+local_cache = LocalCache(
+    max_bytes=app_settings.LOCAL_CACHE_MAX_BYTES,
+    ttl=app_settings.LOCAL_CACHE_TTL,
+    channel=app_settings.CACHE_INVALIDATION_CHANNEL,
+)
+list_cache = CacheLoader(
+    stale_ttl=app_settings.LIST_CACHE_STALE_TTL,
+    lock_lease=app_settings.LIST_CACHE_LOCK_LEASE,
+    local_cache=local_cache,
+)
 
 
 class ClientService:
     redis_repo: RedisRepository = None
+    # Поколение кэша списков: входит в ключи, create увеличивает его
+    generation_key = "clients:generation"
+    # Префикс всех ключей кэша клиентов (для сброса L1 во всех процессах)
+    cache_prefix = "clients"
+    # Совпадают с индексами (поле, id); NULL фамилии сортируются как пустая строка
+    sort_columns = {
+        "creation_date": ClientORM.creation_date,
+        "name": ClientORM.name,
+        # '' литералом, а не параметром: иначе выражение не совпадёт с индексом
+        "surname": func.coalesce(ClientORM.surname, literal_column("''")),
+    }
 
     @classmethod
     async def initialize(cls):
-        cls.redis_repo = await RedisRepository.connect()
+        cls.redis_repo = await get_redis_repo()
+        # Если при старте Redis был недоступен, подписка на сброс L1 и общая
+        # очередь аватаров подключаются при первом удачном подключении
+        local_cache.start(cls.redis_repo)
+        await AvatarService.attach_redis(cls.redis_repo)
 
     @classmethod
     async def create(
-        cls, model: ClientData, uow: IUnitOfWork = UnitOfWork()
+        cls,
+        model: ClientData,
+        uow: IUnitOfWork = UnitOfWork(),
+        avatar_slot: str | None = None,
     ) -> ClientFullData:
         async with uow:
             await cls.check_email_availability(model.email, uow)
-            hashed_password = cls.hash_password(model.password)
-            avatar_content = await cls.process_avatar(model.avatar)
+            hashed_password = await cls.hash_password(model.password)
+            # Исходный файл уже в хранилище, копии строит фоновый обработчик
+            source_hash = model.avatar_source_hash
 
-            data = cls.prepare_client_data(model, hashed_password, avatar_content)
+            data = cls.prepare_client_data(model, hashed_password, None)
+            if source_hash:
+                data["avatar_source_hash"] = source_hash
+                data["avatar_status"] = AvatarStatusEnum.pending
             new_client = await uow.client.add_one(data=data)
             await uow.commit()
+            # Клиент уже сохранён: сбой Redis не должен ронять регистрацию
+            if source_hash:
+                try:
+                    await AvatarService.enqueue(
+                        new_client["id"], source_hash, avatar_slot
+                    )
+                except RedisError as e:
+                    # Аватар поставит в очередь enqueue_pending при старте
+                    logger.warning(
+                        f"Avatar of client {new_client['id']} was not queued: {e}"
+                    )
+            try:
+                await cls.invalidate_list_cache()
+            except RedisError as e:
+                # Списки обновятся по истечении TTL
+                logger.warning(f"List cache was not invalidated: {e}")
+            if spatial_index.loaded:
+                spatial_index.add(
+                    new_client["id"],
+                    new_client["latitude"],
+                    new_client["longitude"],
+                    new_client["gender"],
+                )
             return new_client
 
     @classmethod
@@ -36,20 +118,58 @@ class ClientService:
         cls, email: str, password: str, uow: IUnitOfWork = UnitOfWork()
     ) -> AuthResponse | None:
         async with uow:
-            client = await uow.client.authenticate(email, password)
-            if not client:
+            client = await uow.client.get_credentials_by_email(email)
+            if not client or not await password_hasher.verify(
+                password, client.password
+            ):
                 raise HTTPException(
                     status_code=400,
                     detail="Неверный адрес электронной почты или пароль.",
                 )
+            if password_hasher.needs_rehash(client.password):
+                # Стоимость bcrypt изменилась: хэш обновляется при удачном входе
+                await uow.client.edit_one(
+                    client.id, {"password": await cls.hash_password(password)}
+                )
+                await uow.commit()
             return cls.build_auth_response(client)
 
+    @classmethod
+    async def get_avatar_hash(
+        cls,
+        client_id: int,
+        size: int | None = None,
+        accept: str | None = None,
+        uow: IUnitOfWork | None = None,
+    ) -> str | None:
+        """Хэш аватара в blob_store; None - аватар ещё хранится в таблице.
+
+        Если задан size, выбирается подходящая уменьшенная копия в формате
+        из заголовка Accept. Пока аватар обрабатывается (или обработка не
+        удалась), выбрасывается AvatarNotReadyException.
+        """
+        # Своя сессия на запрос: страница списка грузит много аватаров разом
+        uow = uow or UnitOfWork()
+        async with uow:
+            refs = await uow.client.get_avatar_refs(client_id)
+        if refs is None:
+            return None
+        if refs.avatar_status in (AvatarStatusEnum.pending, AvatarStatusEnum.failed):
+            raise AvatarNotReadyException()
+        if size is not None and refs.avatar_renditions:
+            rendition = ImageProcessor.choose_rendition(
+                refs.avatar_renditions, size, accept
+            )
+            if rendition:
+                return rendition
+        return refs.avatar_hash
+
     @classmethod
     async def get_avatar(cls, client_id: int, uow: IUnitOfWork = UnitOfWork()) -> bytes:
         async with uow:
-            client = await uow.client.get_by_id(client_id)
-            if client and client.avatar:
-                return client.avatar
+            avatar = await uow.client.get_avatar(client_id)
+            if avatar:
+                return avatar
             raise HTTPException(
                 status_code=404, detail="Не найдена аватарка или нет такого клиента."
             )
@@ -59,7 +179,7 @@ class ClientService:
         cls, client_id: int, uow: IUnitOfWork = UnitOfWork()
     ) -> ClientData:
         async with uow:
-            client = await uow.client.get_by_id(client_id)
+            client = await uow.client.get_contact_by_id(client_id)
             if client is None:
                 raise HTTPException(status_code=404, detail="Клиент не найден")
             return client
@@ -87,57 +207,256 @@ class ClientService:
         sort_order: str = "asc",
         user_location: tuple = None,
         distance: float = None,
-        uow: IUnitOfWork = UnitOfWork(),
-    ) -> list[ClientData]:
+        cursor: str = None,
+        limit: int = None,
+        uow: IUnitOfWork | None = None,
+    ) -> tuple[list[ClientData], str | None]:
+        """Страница клиентов и курсор следующей страницы (None, если это последняя)."""
+        if sort_by not in SORT_FIELDS or sort_order not in SORT_ORDERS:
+            raise HTTPException(
+                status_code=400, detail="Неверные параметры сортировки."
+            )
+        try:
+            after = decode_cursor(cursor, sort_by, sort_order) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        limit = min(
+            limit or app_settings.LIST_PAGE_SIZE, app_settings.LIST_MAX_PAGE_SIZE
+        )
+        # Равнозначные запросы приводятся к одному виду и делят запись кэша;
+        # в запрос к БД идут те же нормализованные значения, что и в ключ
+        name = normalize_text(name)
+        surname = normalize_text(surname)
+        if user_location and distance is not None:
+            user_location = round_location(
+                user_location, app_settings.LIST_CACHE_GEO_PRECISION
+            )
+            distance = round(distance, app_settings.LIST_CACHE_DISTANCE_PRECISION)
+        else:
+            user_location, distance = None, None
+
         if cls.redis_repo is None:
             await cls.initialize()
 
+        generation = await cls.get_generation()
         cache_key = cls.build_cache_key(
-            name, surname, gender, sort_by, sort_order, user_location, distance
+            generation,
+            name,
+            surname,
+            gender,
+            sort_by,
+            sort_order,
+            user_location,
+            distance,
+            cursor,
+            limit,
+        )
+        result = await list_cache.get_or_compute(
+            cls.redis_repo,
+            cache_key,
+            lambda: cls.load_page(
+                generation,
+                name,
+                surname,
+                gender,
+                sort_by,
+                sort_order,
+                user_location,
+                distance,
+                after,
+                limit,
+                uow,
+            ),
+            ttl=app_settings.LIST_CACHE_TTL,
         )
-        cached_result = await cls.redis_repo.get_one_obj(cache_key)
-        if cached_result is not None:
-            return cached_result
+        return result["items"], result["next_cursor"]
+
+    @classmethod
+    async def load_page(
+        cls,
+        generation,
+        name,
+        surname,
+        gender,
+        sort_by,
+        sort_order,
+        user_location,
+        distance,
+        after,
+        limit,
+        uow: IUnitOfWork | None = None,
+    ) -> dict:
+        # Страница может строиться фоновой задачей CacheLoader параллельно с
+        # запросами, поэтому сессия у каждого пересчёта своя
+        uow = uow or UnitOfWork()
+        async with uow:
+            predicate = None
+            if user_location and distance is not None and spatial_index.loaded:
+                # Кандидаты берутся из индекса в памяти, из БД читаются только они.
+                # Новое поколение значит, что где-то зарегистрировался клиент:
+                # без догрузки индекса страница без него попала бы в кэш
+                if spatial_index.is_stale(
+                    app_settings.SPATIAL_INDEX_REFRESH_SECONDS
+                ) or spatial_index.is_behind(generation):
+                    await cls.sync_spatial_index(uow, generation)
+                client_ids = spatial_index.query(user_location, distance, gender)
+                query = cls.build_query(name, surname, gender).where(
+                    ClientORM.id
+                    == any_(bindparam("client_ids", client_ids, ARRAY(Integer)))
+                )
+            else:
+                query = cls.build_query(name, surname, gender, user_location, distance)
+                if user_location and distance is not None:
+                    # Точная проверка расстояния для строк из прямоугольника
+                    def predicate(clients):
+                        return cls.filter_clients_by_distance(
+                            clients, user_location, distance
+                        )
+
+            clients = await cls.fetch_page(
+                uow, query, sort_by, sort_order, after, limit, predicate
+            )
+
+            next_cursor = None
+            if len(clients) > limit:
+                clients = clients[:limit]
+                next_cursor = encode_cursor(
+                    sort_by, sort_order, *cls.sort_key(clients[-1], sort_by)
+                )
+
+            return {
+                "items": cls.build_result_clients(clients),
+                "next_cursor": next_cursor,
+            }
+
+    @classmethod
+    async def invalidate_list_cache(cls) -> None:
+        """Все закэшированные страницы списка устаревают разом.
+
+        Старые ключи не удаляются, а перестают читаться и истекают по TTL;
+        кэш L1 остальных процессов сбрасывается сообщением pub/sub.
+        """
+        if cls.redis_repo is None:
+            await cls.initialize()
+        await cls.redis_repo.increment(cls.generation_key)
+        await local_cache.publish_invalidation(cls.redis_repo, cls.cache_prefix)
 
+    @classmethod
+    async def get_generation(cls) -> int:
+        generation = local_cache.get(cls.generation_key)
+        if generation is None:
+            generation = int(await cls.redis_repo.get_one(cls.generation_key) or 0)
+            local_cache.set(cls.generation_key, generation)
+        return generation
+
+    @classmethod
+    async def fetch_page(
+        cls, uow: IUnitOfWork, query, sort_by, sort_order, after, limit, predicate
+    ) -> list:
+        """Читает limit + 1 строк после позиции after диапазонным сканом индекса.
+
+        Если строки дополнительно отсеиваются в Python (predicate), чтение
+        продолжается следующими порциями, пока страница не заполнится.
+        """
+        clients = []
+        while True:
+            page_query = cls.apply_keyset(query, sort_by, sort_order, after)
+            result = await uow.session.execute(page_query.limit(limit + 1))
+            rows = result.all()
+            clients.extend(predicate(rows) if predicate else rows)
+            if len(clients) > limit or len(rows) <= limit:
+                return clients
+            after = cls.sort_key(rows[-1], sort_by)
+
+    @classmethod
+    def apply_keyset(cls, query, sort_by, sort_order, after):
+        column = cls.sort_columns[sort_by]
+        if after is not None:
+            value, client_id = after
+            position = tuple_(column, ClientORM.id)
+            bound = tuple_(literal(value), literal(client_id))
+            query = query.where(
+                position > bound if sort_order == "asc" else position < bound
+            )
+        if sort_order == "asc":
+            return query.order_by(column.asc(), ClientORM.id.asc())
+        return query.order_by(column.desc(), ClientORM.id.desc())
+
+    @staticmethod
+    def sort_key(client, sort_by) -> tuple:
+        value = getattr(client, sort_by)
+        if sort_by == "surname" and value is None:
+            value = ""
+        return value, client.id
+
+    @classmethod
+    async def load_spatial_index(cls, uow: IUnitOfWork | None = None) -> None:
+        uow = uow or UnitOfWork()
         async with uow:
-            query = cls.build_query(name, surname, gender)
-            result = await uow.session.execute(query)
-            clients = result.scalars().all()
+            await cls.sync_spatial_index(uow)
 
-            if user_location and distance is not None:
-                filtered_clients = cls.filter_clients_by_distance(
-                    clients, user_location, distance
+    @staticmethod
+    async def sync_spatial_index(uow: IUnitOfWork, generation: int = 0) -> None:
+        """Догружает в индекс клиентов, созданных после последней синхронизации.
+
+        Нужна, когда регистрации проходят через другие воркеры. generation -
+        поколение кэша списков, прочитанное до догрузки: create меняет его
+        уже после коммита, так что все клиенты этого поколения будут видны.
+        Раз в SPATIAL_INDEX_RELOAD_SECONDS индекс перечитывается целиком.
+        """
+        if spatial_index.needs_reload(app_settings.SPATIAL_INDEX_RELOAD_SECONDS):
+            spatial_index.reload(await uow.client.get_locations())
+        else:
+            rows = await uow.client.get_locations(
+                after_id=spatial_index.sync_from(
+                    app_settings.SPATIAL_INDEX_SYNC_OVERLAP
                 )
-                await cls.redis_repo.add_one_obj(cache_key, filtered_clients, ttl=300)
-                return filtered_clients
+            )
+            spatial_index.add_many(rows)
+        spatial_index.mark_synced(generation)
 
-            result_clients = cls.build_result_clients(clients)
-            await cls.redis_repo.add_one_obj(cache_key, result_clients, ttl=300)
-            return result_clients
+    @classmethod
+    async def ensure_email_available(
+        cls, email: str, uow: IUnitOfWork | None = None
+    ) -> None:
+        uow = uow or UnitOfWork()
+        async with uow:
+            await cls.check_email_availability(email, uow)
 
     @staticmethod
     async def check_email_availability(email: str, uow: IUnitOfWork):
-        existing_client = await uow.client.get_by_email(email)
-        if existing_client:
+        if await uow.client.email_exists(email):
             raise HTTPException(status_code=400, detail=f"Email '{email}' уже занят")
 
     @staticmethod
-    def hash_password(password: str) -> str:
-        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    async def hash_password(password: str) -> str:
+        return await password_hasher.hash(password)
 
     @staticmethod
-    async def process_avatar(avatar_content):
-        if avatar_content:
-            return await ImageProcessor.process_avatar(avatar_content)
-        return None
+    async def store_avatar(
+        renditions: dict[str, bytes] | None,
+    ) -> tuple[str | None, dict[str, str] | None]:
+        if not renditions:
+            return None, None
+        avatar_hash = await blob_store.put(renditions["original"])
+        avatar_renditions = {
+            key: await blob_store.put(content)
+            for key, content in renditions.items()
+            if key != "original"
+        }
+        return avatar_hash, avatar_renditions
 
     @staticmethod
     def prepare_client_data(
-        model: ClientData, hashed_password: str, avatar_content: bytes
+        model: ClientData,
+        hashed_password: str,
+        avatar_hash: str | None,
+        avatar_renditions: dict[str, str] | None = None,
     ) -> dict:
         return {
             "email": model.email,
-            "avatar": avatar_content,
+            "avatar_hash": avatar_hash,
+            "avatar_renditions": avatar_renditions,
             "name": model.name,
             "surname": model.surname,
             "gender": model.gender,
@@ -154,33 +473,98 @@ class ClientService:
             "surname": client.surname,
             "email": client.email,
             "gender": client.gender,
+            "access_token": token_manager.create_access_token(client.id),
+            "refresh_token": token_manager.create_refresh_token(client.id),
+            "token_type": "bearer",
         }
 
     @staticmethod
+    def refresh_tokens(refresh_token: str) -> dict:
+        """Новая пара токенов по refresh-токену (без обращения к БД)."""
+        try:
+            client_id = token_manager.verify(refresh_token, REFRESH)
+        except ValueError as e:
+            raise HTTPException(status_code=401, detail=str(e))
+        return {
+            "access_token": token_manager.create_access_token(client_id),
+            "refresh_token": token_manager.create_refresh_token(client_id),
+            "token_type": "bearer",
+        }
+
+    @classmethod
     def build_cache_key(
-        name, surname, gender, sort_by, sort_order, user_location, distance
+        cls,
+        generation,
+        name,
+        surname,
+        gender,
+        sort_by,
+        sort_order,
+        user_location,
+        distance,
+        cursor=None,
+        limit=None,
     ) -> str:
-        return f"clients_{name}_{surname}_{gender}_{sort_by}_{sort_order}_{user_location}_{distance}"
+        """clients:list:<поколение>:<хэш всех фильтров>; длина ключа ограничена."""
+        digest = fingerprint(
+            {
+                "name": name,
+                "surname": surname,
+                "gender": gender,
+                "sort_by": sort_by,
+                "sort_order": sort_order,
+                "location": user_location,
+                "distance": distance,
+                "cursor": cursor,
+                "limit": limit,
+            }
+        )
+        return f"{cls.cache_prefix}:list:{generation}:{digest}"
 
     @staticmethod
-    def build_query(name, surname, gender):
-        query = select(ClientORM)
+    def build_query(name, surname, gender, user_location=None, distance=None):
+        query = select(*ClientRepository.summary_columns)
         if name:
             query = query.where(ClientORM.name.ilike(f"%{name}%"))
         if surname:
             query = query.where(ClientORM.surname.ilike(f"%{surname}%"))
         if gender:
             query = query.where(ClientORM.gender == gender)
+        if user_location and distance is not None:
+            query = query.where(
+                *ClientService.build_bounding_box_filter(user_location, distance)
+            )
         return query
 
+    @staticmethod
+    def build_bounding_box_filter(user_location, distance) -> list:
+        """Грубый фильтр по прямоугольнику (индекс clients(latitude, longitude)).
+
+        Точная проверка расстояния выполняется потом только для попавших в него
+        строк.
+        """
+        box = distance_calculator.bounding_box(user_location, distance)
+        conditions = [ClientORM.latitude.between(box.min_lat, box.max_lat)]
+        if box.crosses_antimeridian:
+            conditions.append(
+                or_(
+                    ClientORM.longitude >= box.min_lon,
+                    ClientORM.longitude <= box.max_lon,
+                )
+            )
+        else:
+            conditions.append(ClientORM.longitude.between(box.min_lon, box.max_lon))
+        return conditions
+
     @staticmethod
     def filter_clients_by_distance(clients, user_location, distance):
-        return [
-            client
-            for client in clients
-            if great_circle(user_location, (client.latitude, client.longitude)).km
-            <= distance
-        ]
+        mask = distance_calculator.within_radius(
+            user_location,
+            [client.latitude for client in clients],
+            [client.longitude for client in clients],
+            distance,
+        )
+        return [client for client, inside in zip(clients, mask) if inside]
 
     @staticmethod
     def build_result_clients(clients) -> list:
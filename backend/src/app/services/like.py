@@ -1,9 +1,29 @@
 from fastapi import HTTPException
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.app_config.app_settings import app_settings
+from src.app.utils.rate_limiter import SlidingWindowLimiter
 from src.app.utils.unitofwork import IUnitOfWork, UnitOfWork
-from datetime import datetime, timedelta
+from src.redisrepo.dependencies import get_redis_repo
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
 
 
 class LikeService:
+    limiter: SlidingWindowLimiter = None
+
+    @classmethod
+    async def get_limiter(cls) -> SlidingWindowLimiter:
+        if cls.limiter is None:
+            cls.limiter = SlidingWindowLimiter(
+                await get_redis_repo(),
+                prefix="likes",
+                limit=app_settings.LIKE_DAILY_LIMIT,
+                window=app_settings.LIKE_WINDOW_SECONDS,
+            )
+        return cls.limiter
+
     @classmethod
     async def check_daily_limit(
         cls, user_id: int, uow: IUnitOfWork = UnitOfWork()
@@ -13,7 +33,59 @@ class LikeService:
             count = await uow.like.get_count_by_param(
                 user_id=user_id, creation_date=limit_time
             )
-            return count >= 5
+            return count >= app_settings.LIKE_DAILY_LIMIT
+
+    @classmethod
+    async def like_history(
+        cls, user_id: int, uow: Optional[IUnitOfWork] = None
+    ) -> List[float]:
+        """Время лайков пользователя в окне для загрузки окна в Redis.
+
+        В БД хранится только дата, поэтому лайк считается сделанным в конце
+        своего дня (но не позже текущего момента): после рестарта Redis
+        лимит может быть строже, но не мягче.
+        """
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(seconds=app_settings.LIKE_WINDOW_SECONDS)
+        uow = uow or UnitOfWork()
+        async with uow:
+            dates = await uow.like.get_creation_dates(user_id, since.date())
+        return [cls.end_of_day(day, now).timestamp() for day in dates]
+
+    @staticmethod
+    def end_of_day(day: date, now: datetime) -> datetime:
+        end = datetime.combine(day + timedelta(days=1), time(), timezone.utc)
+        return min(end, now)
+
+    @classmethod
+    async def create_like_with_limit(cls, user_id: int, liked_user_id: int):
+        """Создаёт лайк, если пользователь не исчерпал лимит за окно.
+
+        Проверка и учёт лайка - одна атомарная операция в Redis, поэтому
+        параллельные запросы не превысят лимит. Если лайк не создан, слот
+        возвращается. Без Redis лимит проверяется подсчётом в БД.
+        """
+        try:
+            limiter = await cls.get_limiter()
+            token = await limiter.acquire(
+                str(user_id), lambda: cls.like_history(user_id)
+            )
+        except RedisError as e:
+            logger.warning(f"Like limiter is unavailable: {e}")
+            if await cls.check_daily_limit(user_id):
+                raise HTTPException(status_code=400, detail="Лимит Лайков.")
+            return await cls.create_like(user_id, liked_user_id)
+
+        if token is None:
+            raise HTTPException(status_code=400, detail="Лимит Лайков.")
+        try:
+            return await cls.create_like(user_id, liked_user_id)
+        except Exception:
+            try:
+                await limiter.release(str(user_id), token)
+            except RedisError as e:
+                logger.warning(f"Like limit slot was not released: {e}")
+            raise
 
     @classmethod
     async def create_like(
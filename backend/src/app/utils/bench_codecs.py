@@ -0,0 +1,77 @@
+import argparse
+import random
+import string
+import time
+from types import SimpleNamespace
+from typing import List
+
+from src.app.schemas.enums import GenderEnum
+from src.app.services.client import ClientService
+from src.app_config.redis_codec import (
+    COMPRESSORS,
+    SERIALIZERS,
+    CacheCodec,
+    PickleCodec,
+)
+
+
+def sample_page(size: int) -> dict:
+    """Страница списка в том виде, в каком она кладётся в кэш."""
+    rows = [
+        SimpleNamespace(
+            id=client_id,
+            name="".join(random.choices(string.ascii_letters, k=8)),
+            surname="".join(random.choices(string.ascii_letters, k=10)),
+            email=f"user{client_id}@example.com",
+            gender=random.choice(list(GenderEnum)),
+            latitude=random.uniform(-90, 90),
+            longitude=random.uniform(-180, 180),
+        )
+        for client_id in range(1, size + 1)
+    ]
+    return {
+        "items": ClientService.build_result_clients(rows),
+        "next_cursor": "WyJjcmVhdGlvbl9kYXRlIiwgImFzYyIsICIyMDI0LTExLTAxIiwgNTBd",
+    }
+
+
+def available_codecs(threshold: int) -> List[tuple]:
+    codecs = [("pickle", PickleCodec())]
+    for serializer, *_ in SERIALIZERS.values():
+        for compression, *_ in COMPRESSORS.values():
+            try:
+                codec = CacheCodec(serializer, compression, threshold)
+            except (ValueError, NameError):
+                continue
+            codecs.append((f"{serializer}+{compression}", codec))
+    return codecs
+
+
+def measure(codec, value, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = codec.dumps(value)
+    dumps_time = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        codec.loads(data)
+    loads_time = (time.perf_counter() - start) / repeat
+    return len(data), dumps_time, loads_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cache codecs")
+    parser.add_argument("--sizes", default="50,200", help="Page sizes, e.g. 50,200")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+
+    for size in map(int, args.sizes.split(",")):
+        page = sample_page(size)
+        print(f"\npage of {size} clients")
+        print(f"{'codec':<16}{'bytes':>10}{'dumps, us':>12}{'loads, us':>12}")
+        for name, codec in available_codecs(args.threshold):
+            length, dumps_time, loads_time = measure(codec, page, args.repeat)
+            print(
+                f"{name:<16}{length:>10}{dumps_time * 1e6:>12.1f}{loads_time * 1e6:>12.1f}"
+            )
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, Optional
+
+from src.app_config.app_settings import app_settings
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore(ABC):
+    """Хранилище бинарных данных, адресуемых sha256 от содержимого."""
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @abstractmethod
+    async def put(self, data: bytes) -> str:
+        """Сохраняет данные и возвращает их хэш."""
+
+    @abstractmethod
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> str:
+        """Сохраняет данные по частям, не собирая их в памяти, и возвращает хэш."""
+
+    @abstractmethod
+    async def get(self, blob_hash: str) -> Optional[bytes]:
+        """Возвращает данные по хэшу или None."""
+
+    @abstractmethod
+    async def exists(self, blob_hash: str) -> bool:
+        """Проверяет наличие данных."""
+
+    @abstractmethod
+    async def delete(self, blob_hash: str) -> None:
+        """Удаляет данные."""
+
+    def local_path(self, blob_hash: str) -> Optional[str]:
+        """Путь к файлу для отдачи через sendfile, если хранилище локальное."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """Файловое хранилище: root/ab/cd/abcd..., запись через временный файл и rename."""
+
+    def __init__(self, root: str, depth: int = 2, width: int = 2):
+        self.root = root
+        self.depth = depth
+        self.width = width
+
+    def _path(self, blob_hash: str) -> str:
+        if not HASH_PATTERN.match(blob_hash):
+            raise ValueError(f"Invalid blob hash: {blob_hash!r}")
+        shards = [
+            blob_hash[i * self.width : (i + 1) * self.width] for i in range(self.depth)
+        ]
+        return os.path.join(self.root, *shards, blob_hash)
+
+    def local_path(self, blob_hash: str) -> Optional[str]:
+        path = self._path(blob_hash)
+        return path if os.path.exists(path) else None
+
+    async def put(self, data: bytes) -> str:
+        blob_hash = self.content_hash(data)
+        path = self._path(blob_hash)
+        if not os.path.exists(path):
+            await asyncio.to_thread(self._write, path, data)
+        return blob_hash
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Временный файл в том же каталоге: os.replace атомарен в пределах ФС
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> str:
+        # Хэш известен только в конце, поэтому временный файл лежит в корне
+        os.makedirs(self.root, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    await asyncio.to_thread(file.write, chunk)
+                await asyncio.to_thread(self._sync, file)
+            blob_hash = digest.hexdigest()
+            path = self._path(blob_hash)
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+            return blob_hash
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _sync(file) -> None:
+        file.flush()
+        os.fsync(file.fileno())
+
+    async def get(self, blob_hash: str) -> Optional[bytes]:
+        path = self._path(blob_hash)
+        try:
+            return await asyncio.to_thread(self._read, path)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+
+    async def exists(self, blob_hash: str) -> bool:
+        return os.path.exists(self._path(blob_hash))
+
+    async def delete(self, blob_hash: str) -> None:
+        try:
+            os.remove(self._path(blob_hash))
+        except FileNotFoundError:
+            pass
+
+
+blob_store = LocalBlobStore(os.path.join(app_settings.SAVE_PATH, "avatars"))
@@ -0,0 +1,175 @@
+import asyncio
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+from redis.exceptions import LockError
+
+from src.app_config.config_redis import RedisRepository
+from src.app.utils.local_cache import LocalCache
+from src.app.utils.metrics import metrics
+
+
+class CacheLoader:
+    """Кэш с защитой от «лавины» пересчётов при истечении ключа.
+
+    Запись хранит значение, мягкий срок expires и время вычисления delta;
+    в Redis она живёт ещё stale_ttl секунд после expires. Пересчёт:
+
+    - в процессе одновременные запросы одного ключа ждут одну задачу;
+    - между процессами пересчитывает только тот, кто взял короткую
+      блокировку в Redis (lock_lease секунд), остальные получают прежнее
+      значение, а если его нет - ждут, пока оно появится;
+    - незадолго до expires пересчёт запускается с вероятностью, растущей
+      к сроку и пропорциональной delta (probabilistic early expiration), так
+      что популярный ключ обычно обновляется до того, как устареет;
+    - пока есть прежнее значение, его получают сразу, а пересчёт (один на
+      ключ в процессе) идёт фоновой задачей; ждут только запросы без значения.
+
+    Если задан local_cache, свежие значения дополнительно лежат в памяти
+    процесса и читаются без обращения к Redis.
+    """
+
+    def __init__(
+        self,
+        stale_ttl: int = 300,
+        lock_lease: float = 5.0,
+        beta: float = 1.0,
+        poll_interval: float = 0.05,
+        local_cache: Optional[LocalCache] = None,
+    ):
+        self.stale_ttl = stale_ttl
+        self.lock_lease = lock_lease
+        self.beta = beta
+        self.poll_interval = poll_interval
+        self.local_cache = local_cache
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_compute(
+        self,
+        redis_repo: RedisRepository,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> Any:
+        if self.local_cache is not None:
+            value = self.local_cache.get(key)
+            if value is not None:
+                return value
+        entry = await self._read(redis_repo, key)
+        metrics.increment("cache.redis.misses" if entry is None else "cache.redis.hits")
+        if entry is not None:
+            if self._should_refresh(entry):
+                # Прежнее значение отдаётся сразу, пересчёт идёт в фоне
+                self._refresh(redis_repo, key, compute, ttl, entry)
+            else:
+                self._remember(key, entry)
+            return entry["value"]
+        # Значения нет: ждут все, но пересчёт в процессе один
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._start(redis_repo, key, compute, ttl, None)
+        # shield: отмена одного ожидающего не отменяет общий пересчёт
+        return await asyncio.shield(task)
+
+    def _start(
+        self,
+        redis_repo: RedisRepository,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        entry: Optional[dict],
+    ) -> asyncio.Task:
+        task = asyncio.create_task(
+            self._recompute(redis_repo, key, compute, ttl, entry)
+        )
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    def _refresh(
+        self,
+        redis_repo: RedisRepository,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        entry: dict,
+    ) -> None:
+        if key in self._in_flight:
+            return
+        task = self._start(redis_repo, key, compute, ttl, entry)
+        task.add_done_callback(lambda done: self._log_failure(key, done))
+
+    @staticmethod
+    def _log_failure(key: str, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            metrics.increment("cache.refresh.errors")
+            logger.warning(f"Background refresh of {key} failed: {task.exception()}")
+
+    def _remember(self, key: str, entry: dict) -> None:
+        if self.local_cache is not None:
+            self.local_cache.set(key, entry["value"], entry["expires"])
+
+    @staticmethod
+    async def _read(redis_repo: RedisRepository, key: str) -> Optional[dict]:
+        entry = await redis_repo.get_one_obj(key)
+        if not isinstance(entry, dict) or "expires" not in entry:
+            # Нет записи или запись старого формата
+            return None
+        return entry
+
+    def _should_refresh(self, entry: dict) -> bool:
+        # XFetch: now - delta * beta * ln(rand) >= expires
+        jitter = -entry["delta"] * self.beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry["expires"]
+
+    async def _recompute(
+        self,
+        redis_repo: RedisRepository,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        entry: Optional[dict],
+    ) -> Any:
+        lock = redis_repo.lock(f"{key}:lock", self.lock_lease)
+        if not await lock.acquire():
+            if entry is not None:
+                # Пересчитывает другой процесс: отдаём прежнее значение
+                return entry["value"]
+            deadline = time.monotonic() + self.lock_lease
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                entry = await self._read(redis_repo, key)
+                if entry is not None:
+                    return entry["value"]
+            # Владелец блокировки не успел (или упал): считаем сами
+            return await self._compute_and_store(redis_repo, key, compute, ttl)
+        try:
+            return await self._compute_and_store(redis_repo, key, compute, ttl)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                # Аренда истекла во время пересчёта
+                pass
+
+    async def _compute_and_store(
+        self,
+        redis_repo: RedisRepository,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> Any:
+        started = time.monotonic()
+        metrics.increment("cache.loads")
+        value = await compute()
+        entry = {
+            "value": value,
+            "delta": time.monotonic() - started,
+            "expires": time.time() + ttl,
+        }
+        await redis_repo.add_one_obj(key, entry, ttl=ttl + self.stale_ttl)
+        self._remember(key, entry)
+        return value
@@ -1,11 +1,26 @@
-from math import radians, sin, cos, sqrt, atan2
-from concurrent.futures import ProcessPoolExecutor
-import asyncio
+from math import asin, degrees, pi, radians, sin, cos, sqrt, atan2
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class BoundingBox(NamedTuple):
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        """Прямоугольник пересекает 180-й меридиан: долгота вне [max_lon, min_lon]."""
+        return self.min_lon > self.max_lon
 
 
 class DistanceCalculator:
-    def __init__(self):
+    def __init__(self, chunk_size: int = 65536):
         self.R = 6371.0  # Радиус Земли в км
+        # Размер блока для поблочного режима (ограничивает временные массивы)
+        self.chunk_size = chunk_size
 
     def calculate_distance(
         self, lat1: float, lon1: float, lat2: float, lon2: float
@@ -21,15 +36,122 @@ class DistanceCalculator:
         c = 2 * atan2(sqrt(a), sqrt(1 - a))
         return self.R * c
 
-    async def calculate_distances(self, locations):
-        """Асинхронный метод для вычисления расстояний между множеством точек."""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor() as executor:
-            futures = [
-                loop.run_in_executor(executor, self.calculate_distance, *loc)
-                for loc in locations
-            ]
-            return await asyncio.gather(*futures)
+    def bounding_box(self, origin: Tuple[float, float], radius: float) -> BoundingBox:
+        """Прямоугольник широт/долгот, гарантированно содержащий круг радиуса radius км.
+
+        Учитывает полюса (круг накрывает полюс -> все долготы) и 180-й
+        меридиан (min_lon > max_lon).
+        """
+        lat = radians(origin[0])
+        lon = radians(origin[1])
+        angular = radius / self.R
+
+        min_lat = lat - angular
+        max_lat = lat + angular
+        if angular >= pi or min_lat <= -pi / 2 or max_lat >= pi / 2:
+            return BoundingBox(
+                degrees(max(min_lat, -pi / 2)),
+                degrees(min(max_lat, pi / 2)),
+                -180.0,
+                180.0,
+            )
+
+        delta_lon = asin(min(1.0, sin(angular) / cos(lat)))
+        min_lon = lon - delta_lon
+        max_lon = lon + delta_lon
+        if min_lon < -pi:
+            min_lon += 2 * pi
+        if max_lon > pi:
+            max_lon -= 2 * pi
+        return BoundingBox(
+            degrees(min_lat), degrees(max_lat), degrees(min_lon), degrees(max_lon)
+        )
+
+    @staticmethod
+    def to_array(values: Iterable[Optional[float]]) -> np.ndarray:
+        """Приводит координаты к непрерывному буферу float64 (None -> NaN)."""
+        if isinstance(values, np.ndarray):
+            return np.ascontiguousarray(values, dtype=np.float64)
+        return np.fromiter(
+            (np.nan if value is None else value for value in values),
+            dtype=np.float64,
+        )
+
+    def calculate_distances(
+        self,
+        origin: Tuple[float, float],
+        latitudes: Iterable[Optional[float]],
+        longitudes: Iterable[Optional[float]],
+        chunked: bool = False,
+    ) -> np.ndarray:
+        """Векторно вычисляет расстояния (км) от origin до всех точек за один проход.
+
+        Точки без координат получают NaN. В поблочном режиме вычисление идёт
+        кусками по chunk_size, чтобы не держать в памяти временные массивы
+        размером со всю выборку.
+        """
+        lats = self.to_array(latitudes)
+        lons = self.to_array(longitudes)
+        if lats.shape != lons.shape:
+            raise ValueError("Размеры массивов широт и долгот не совпадают.")
+
+        distances = np.empty_like(lats)
+        if not chunked or lats.size <= self.chunk_size:
+            self._haversine(origin, lats, lons, distances)
+            return distances
+
+        for start in range(0, lats.size, self.chunk_size):
+            stop = start + self.chunk_size
+            self._haversine(
+                origin, lats[start:stop], lons[start:stop], distances[start:stop]
+            )
+        return distances
+
+    def within_radius(
+        self,
+        origin: Tuple[float, float],
+        latitudes: Iterable[Optional[float]],
+        longitudes: Iterable[Optional[float]],
+        radius: float,
+        chunked: bool = False,
+    ) -> np.ndarray:
+        """Булева маска точек, лежащих не дальше radius км от origin."""
+        distances = self.calculate_distances(origin, latitudes, longitudes, chunked)
+        # NaN (нет координат) при сравнении даёт False
+        return distances <= radius
+
+    def _haversine(
+        self,
+        origin: Tuple[float, float],
+        lats: np.ndarray,
+        lons: np.ndarray,
+        out: np.ndarray,
+    ) -> None:
+        lat0 = radians(origin[0])
+        lon0 = radians(origin[1])
+        phi = np.radians(lats)
+        lam = np.radians(lons)
+
+        # sin^2(dlat / 2)
+        a = np.subtract(phi, lat0)
+        a *= 0.5
+        np.sin(a, out=a)
+        np.square(a, out=a)
+
+        # cos(lat0) * cos(lat) * sin^2(dlon / 2)
+        b = np.subtract(lam, lon0, out=lam)
+        b *= 0.5
+        np.sin(b, out=b)
+        np.square(b, out=b)
+        np.cos(phi, out=phi)
+        b *= phi
+        b *= cos(lat0)
+
+        a += b
+        np.clip(a, 0.0, 1.0, out=a)
+        np.sqrt(a, out=a)
+        np.arcsin(a, out=a)
+        np.multiply(a, 2 * self.R, out=out)
 
 
 distance_calculator = DistanceCalculator()
@@ -0,0 +1,36 @@
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Регистр и пробелы не влияют на фильтр (поиск идёт через ILIKE)."""
+    if value is None:
+        return None
+    value = " ".join(value.split()).casefold()
+    return value or None
+
+
+def round_location(
+    location: Optional[Tuple[float, float]], precision: int
+) -> Optional[Tuple[float, float]]:
+    if location is None:
+        return None
+    return round(location[0], precision), round(location[1], precision)
+
+
+def fingerprint(params: dict, length: int = 32) -> str:
+    """Короткий стабильный хэш параметров запроса (порядок ключей не важен)."""
+    payload = json.dumps(
+        params,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_default,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:length]
+
+
+def _default(value: Any) -> Any:
+    # Enum и прочие значения фильтров сводятся к строке
+    return getattr(value, "value", str(value))
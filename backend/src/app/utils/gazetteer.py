@@ -0,0 +1,200 @@
+import argparse
+import csv
+import difflib
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import cyrtranslit
+
+# Формат файла (little-endian):
+#   заголовок  - магия, число записей, число ключей, смещение блока строк
+#   записи     - широта, долгота, население
+#   ключи      - смещение строки, длина строки, номер записи (по возрастанию строки)
+#   строки     - нормализованные названия в utf-8
+MAGIC = b"GZT1"
+HEADER = struct.Struct("<4sIII")
+RECORD = struct.Struct("<ddI")
+KEY = struct.Struct("<III")
+
+MIN_PREFIX_LENGTH = 4
+FUZZY_CUTOFF = 0.8
+FUZZY_PREFIX_LENGTH = 2
+
+
+def normalize_city(city: str) -> str:
+    """Регистр, пробелы и кириллица приводятся к одному виду."""
+    return cyrtranslit.to_latin(" ".join(city.split()).casefold(), "ru")
+
+
+class Gazetteer:
+    """Локальный справочник городов, отображённый в память (mmap).
+
+    Файл не разбирается целиком: поиск идёт бинарным поиском прямо по
+    отсортированной таблице ключей, поэтому загрузка занимает константное
+    время, а страницы файла делятся между воркерами через page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.record_count, self.key_count, self._strings_offset = (
+            HEADER.unpack_from(self._buffer, 0)
+        )
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a gazetteer file")
+        self._records_offset = HEADER.size
+        self._keys_offset = self._records_offset + self.record_count * RECORD.size
+
+    def close(self) -> None:
+        self._buffer.close()
+        self._file.close()
+
+    def lookup(self, city: str, fuzzy: bool = True) -> Optional[Tuple[float, float]]:
+        """Точное совпадение, затем опечатки, затем префикс названия.
+
+        С fuzzy=False - только точное совпадение (бинарный поиск, без difflib).
+        """
+        key = normalize_city(city).encode()
+        if not key:
+            return None
+        record = self._exact(key)
+        if record is None and fuzzy:
+            record = self._fuzzy(key) or (
+                self._prefix(key) if len(key) >= MIN_PREFIX_LENGTH else None
+            )
+        if record is None:
+            return None
+        latitude, longitude, _ = record
+        return latitude, longitude
+
+    def _key(self, index: int) -> Tuple[bytes, int]:
+        offset, length, record_index = KEY.unpack_from(
+            self._buffer, self._keys_offset + index * KEY.size
+        )
+        start = self._strings_offset + offset
+        return self._buffer[start : start + length], record_index
+
+    def _record(self, index: int) -> Tuple[float, float, int]:
+        return RECORD.unpack_from(
+            self._buffer, self._records_offset + index * RECORD.size
+        )
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _best(
+        self, record_indexes: Iterable[int]
+    ) -> Optional[Tuple[float, float, int]]:
+        # Из одноимённых городов выбирается самый крупный
+        records = [self._record(index) for index in record_indexes]
+        return max(records, key=lambda record: record[2], default=None)
+
+    def _exact(self, key: bytes) -> Optional[Tuple[float, float, int]]:
+        matches = []
+        index = self._lower_bound(key)
+        while index < self.key_count:
+            candidate, record_index = self._key(index)
+            if candidate != key:
+                break
+            matches.append(record_index)
+            index += 1
+        return self._best(matches)
+
+    def _prefix(
+        self, key: bytes, limit: int = 1000
+    ) -> Optional[Tuple[float, float, int]]:
+        matches = []
+        index = self._lower_bound(key)
+        while index < self.key_count and len(matches) < limit:
+            candidate, record_index = self._key(index)
+            if not candidate.startswith(key):
+                break
+            matches.append(record_index)
+            index += 1
+        return self._best(matches)
+
+    def _fuzzy(
+        self, key: bytes, limit: int = 2000
+    ) -> Optional[Tuple[float, float, int]]:
+        # Кандидаты - ближайшие к ключу в порядке сортировки (по limit // 2 с
+        # каждой стороны) среди ключей с теми же первыми буквами: опечатки
+        # в начале названия редки
+        prefix = key[:FUZZY_PREFIX_LENGTH]
+        candidates = {}
+        middle = self._lower_bound(key)
+        for indexes in (
+            range(middle - 1, max(middle - limit // 2, 0) - 1, -1),
+            range(middle, min(middle + limit // 2, self.key_count)),
+        ):
+            for index in indexes:
+                candidate, record_index = self._key(index)
+                if not candidate.startswith(prefix):
+                    break
+                candidates.setdefault(candidate.decode(), []).append(record_index)
+        close = difflib.get_close_matches(
+            key.decode(), candidates, n=1, cutoff=FUZZY_CUTOFF
+        )
+        if not close:
+            return None
+        return self._best(candidates[close[0]])
+
+
+def build_gazetteer(
+    source: str, target: str, countries: Optional[Sequence[str]] = None
+) -> int:
+    """Собирает файл справочника из выгрузки GeoNames (cities*.txt)."""
+    records: List[Tuple[float, float, int]] = []
+    keys = set()
+    with open(source, encoding="utf-8", newline="") as file:
+        for row in csv.reader(file, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if countries and row[8] not in countries:
+                continue
+            record_index = len(records)
+            records.append((float(row[4]), float(row[5]), int(row[14] or 0)))
+            names = [row[1], row[2], *row[3].split(",")]
+            for name in names:
+                normalized = normalize_city(name).encode()
+                if normalized:
+                    keys.add((normalized, record_index))
+
+    strings = bytearray()
+    key_table = bytearray()
+    for normalized, record_index in sorted(keys):
+        key_table += KEY.pack(len(strings), len(normalized), record_index)
+        strings += normalized
+
+    strings_offset = HEADER.size + len(records) * RECORD.size + len(key_table)
+    temp_path = f"{target}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(records), len(keys), strings_offset))
+        for record in records:
+            file.write(RECORD.pack(*record))
+        file.write(key_table)
+        file.write(strings)
+    os.replace(temp_path, target)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build gazetteer from GeoNames dump")
+    parser.add_argument("source", help="GeoNames cities*.txt")
+    parser.add_argument("target", help="Output gazetteer file")
+    parser.add_argument("--countries", help="Comma separated ISO codes, e.g. RU,BY")
+    args = parser.parse_args()
+
+    countries = args.countries.split(",") if args.countries else None
+    count = build_gazetteer(args.source, args.target, countries)
+    print(f"{count} cities written to {args.target}", file=sys.stderr)
@@ -1,26 +1,195 @@
+import asyncio
+import os
+import random
 import httpx
-from typing import Optional, Tuple
+from cachetools import TLRUCache
+from loguru import logger
+from redis.exceptions import RedisError
+from typing import Dict, Optional, Tuple
+
+from src.app_config.config_geocoding import geocoding_settings
+from src.app_config.config_redis import RedisRepository
+from src.redisrepo.dependencies import get_redis_repo
+from src.app.utils.gazetteer import Gazetteer, normalize_city
+from src.app.utils.rate_limiter import TokenBucket
+
+# Маркер «город не найден» для негативного кэширования
+NOT_FOUND = ()
+NOT_FOUND_MESSAGE = "Координаты не найдены для указанного города."
 
 
 class GeocodingService:
+    cache_prefix = "geocode:"
+
     def __init__(self):
-        self.base_url = "https://nominatim.openstreetmap.org/search"
+        self.base_url = geocoding_settings.BASE_URL
+        self.client: Optional[httpx.AsyncClient] = None
+        self.rate_limiter = TokenBucket(
+            geocoding_settings.RATE_LIMIT, geocoding_settings.RATE_BURST
+        )
+        self._local_cache = TLRUCache(
+            maxsize=geocoding_settings.LOCAL_CACHE_SIZE, ttu=self._time_to_use
+        )
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._gazetteer: Optional[Gazetteer] = None
+        self._gazetteer_checked = False
+
+    async def start(self) -> None:
+        """Создаёт общий HTTP-клиент с пулом keep-alive соединений."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                headers={"User-Agent": geocoding_settings.USER_AGENT},
+                timeout=httpx.Timeout(
+                    geocoding_settings.READ_TIMEOUT,
+                    connect=geocoding_settings.CONNECT_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=geocoding_settings.MAX_CONNECTIONS,
+                    max_keepalive_connections=geocoding_settings.MAX_CONNECTIONS,
+                ),
+            )
+
+    async def stop(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @staticmethod
+    def _time_to_use(_key, value, now) -> float:
+        if value == NOT_FOUND:
+            return now + geocoding_settings.NEGATIVE_CACHE_TTL
+        return now + geocoding_settings.LOCAL_CACHE_TTL
+
+    @staticmethod
+    def normalize_city(city: str) -> str:
+        """Ключ кэша: регистр, пробелы и кириллица приводятся к одному виду."""
+        return normalize_city(city)
+
+    @property
+    def gazetteer(self) -> Optional[Gazetteer]:
+        """Локальный справочник городов; открывается один раз при первом обращении."""
+        if not self._gazetteer_checked:
+            self._gazetteer_checked = True
+            path = geocoding_settings.GAZETTEER_PATH
+            if path and os.path.exists(path):
+                try:
+                    self._gazetteer = Gazetteer(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Gazetteer {path} was not loaded: {e}")
+        return self._gazetteer
 
     async def get_coordinates(self, city: str) -> Optional[Tuple[float, float]]:
-        """Получение координат города по названию с использованием Nominatim API."""
+        """Координаты города: L1 -> справочник -> Redis -> Nominatim."""
+        key = self.normalize_city(city)
+        coordinates = self._local_cache.get(key)
+        if coordinates is None and self.gazetteer is not None:
+            # Справочник отвечает без сети; Nominatim нужен только для промахов
+            coordinates = self.gazetteer.lookup(city, fuzzy=False)
+            if coordinates is None:
+                # Поиск опечаток - сотни сравнений difflib, не в цикле событий.
+                # Результат _resolve, в том числе NOT_FOUND, ляжет в L1
+                coordinates = await asyncio.to_thread(self.gazetteer.lookup, city)
+            if coordinates is not None:
+                self._local_cache[key] = coordinates
+        if coordinates is None:
+            # Параллельные запросы одного города ждут один и тот же поиск
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._resolve(key, city.strip()))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            coordinates = await asyncio.shield(task)
+
+        if coordinates == NOT_FOUND:
+            raise ValueError(NOT_FOUND_MESSAGE)
+        return coordinates
+
+    async def _resolve(self, key: str, city: str) -> Tuple[float, ...]:
+        redis_repo = await self._get_redis_repo()
+        cache_key = f"{self.cache_prefix}{key}"
+
+        if redis_repo is not None:
+            try:
+                cached = await redis_repo.get_one(cache_key)
+            except RedisError:
+                cached = None
+            if cached is not None:
+                coordinates = self._decode(cached)
+                self._local_cache[key] = coordinates
+                return coordinates
+
+        coordinates = await self._fetch(city)
+        self._local_cache[key] = coordinates
+        if redis_repo is not None:
+            ttl = (
+                geocoding_settings.NEGATIVE_CACHE_TTL
+                if coordinates == NOT_FOUND
+                else geocoding_settings.REDIS_CACHE_TTL
+            )
+            try:
+                await redis_repo.add_one(cache_key, self._encode(coordinates), ttl=ttl)
+            except RedisError:
+                pass
+        return coordinates
+
+    async def _fetch(self, city: str) -> Tuple[float, ...]:
+        """Запрос координат города к Nominatim API."""
         params = {
             "q": city,
             "format": "json",
             "limit": 1,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.base_url, params=params)
-            if response.status_code == 200 and response.json():
-                data = response.json()[0]
-                latitude = float(data["lat"])
-                longitude = float(data["lon"])
-                return latitude, longitude
-        raise ValueError("Координаты не найдены для указанного города.")
+        response = await self._request(params)
+        if response is None or response.status_code != 200:
+            # Сбой сервиса не кэшируется как «город не найден»
+            raise ValueError(NOT_FOUND_MESSAGE)
+        data = response.json()
+        if not data:
+            return NOT_FOUND
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+    async def _request(self, params: dict) -> Optional[httpx.Response]:
+        """GET с лимитом частоты и повторами при сетевых сбоях, 429 и 5xx."""
+        if self.client is None:
+            await self.start()
+        response = None
+        for attempt in range(geocoding_settings.MAX_RETRIES + 1):
+            if attempt:
+                # Экспоненциальная задержка со случайным разбросом (full jitter)
+                await asyncio.sleep(
+                    random.uniform(0, geocoding_settings.BACKOFF_BASE * 2**attempt)
+                )
+            await self.rate_limiter.acquire()
+            try:
+                response = await self.client.get(self.base_url, params=params)
+            except httpx.TransportError as e:
+                logger.warning(f"Geocoding request failed: {e}")
+                response = None
+                continue
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+        return response
+
+    @staticmethod
+    async def _get_redis_repo() -> Optional[RedisRepository]:
+        # Redis недоступен -> работаем только с локальным кэшем
+        try:
+            return await get_redis_repo()
+        except RedisError:
+            return None
+
+    @staticmethod
+    def _encode(coordinates: Tuple[float, ...]) -> str:
+        return ",".join(repr(value) for value in coordinates)
+
+    @staticmethod
+    def _decode(value: bytes | str) -> Tuple[float, ...]:
+        if isinstance(value, bytes):
+            value = value.decode()
+        if not value:
+            return NOT_FOUND
+        latitude, longitude = value.split(",")
+        return float(latitude), float(longitude)
 
 
 geocoding_service = GeocodingService()
@@ -0,0 +1,60 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+def make_etag(content_hash: str) -> str:
+    return f'"{content_hash}"'
+
+
+def format_http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def accepts(accept: Optional[str], media_type: str) -> bool:
+    """Клиент явно перечислил media_type в Accept с q > 0."""
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        name, *params = media_range.split(";")
+        if name.strip().lower() != media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Слабое сравнение ETag для If-None-Match (RFC 9110, 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def is_not_modified(
+    headers: Mapping[str, str], etag: str, last_modified: Optional[float] = None
+) -> bool:
+    """Нужно ли ответить 304. If-None-Match важнее If-Modified-Since."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # В HTTP-дате нет долей секунды
+    return int(last_modified) <= since
@@ -1,35 +1,127 @@
 import io
-import asyncio
 from PIL import Image
 
+from src.app_config.app_settings import app_settings
+from src.app.utils.http_cache import accepts
+from src.app.utils.process_pool import image_pool
+from src.app.utils.watermark import watermark_cache
+
 
 class ImageProcessor:
+    # Сигнатуры поддерживаемых форматов: (смещение, байты, media type)
+    signatures = (
+        (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+        (0, b"\xff\xd8\xff", "image/jpeg"),
+        (8, b"WEBP", "image/webp"),
+        (0, b"GIF87a", "image/gif"),
+        (0, b"GIF89a", "image/gif"),
+    )
+
+    # Форматы уменьшенных копий: расширение -> (формат Pillow, параметры save)
+    rendition_formats = {
+        "webp": ("WEBP", {"quality": 80, "method": 4}),
+        "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    }
+
+    # Заглушка, которая отдаётся, пока аватар обрабатывается
+    placeholder_color = (200, 200, 200, 255)
+    _placeholder: bytes | None = None
+
+    @classmethod
+    def placeholder(cls) -> bytes:
+        if cls._placeholder is None:
+            size = min(app_settings.AVATAR_SIZES)
+            image = Image.new("RGBA", (size, size), cls.placeholder_color)
+            cls._placeholder = cls._encode(image, "PNG")
+        return cls._placeholder
+
+    @classmethod
+    def detect_media_type(cls, header: bytes) -> str | None:
+        """Определяет тип изображения по первым байтам (магическим числам)."""
+        for offset, signature, media_type in cls.signatures:
+            if header[offset : offset + len(signature)] == signature:
+                if media_type == "image/webp" and not header.startswith(b"RIFF"):
+                    continue
+                return media_type
+        return None
+
     @staticmethod
-    async def add_watermark_async(
-        original_image: Image.Image, watermark_image: Image.Image, position=(0, 0)
-    ) -> Image.Image:
-        return await asyncio.to_thread(
-            ImageProcessor._add_watermark, original_image, watermark_image, position
-        )
+    def check_dimensions(size: tuple[int, int]) -> None:
+        width, height = size
+        if width * height > app_settings.AVATAR_MAX_PIXELS:
+            raise ValueError("Слишком большое разрешение изображения.")
+
+    @classmethod
+    def read_dimensions(cls, path: str) -> tuple[int, int]:
+        """Размер из заголовка файла: пиксели при этом не декодируются."""
+        with Image.open(path) as image:
+            cls.check_dimensions(image.size)
+            return image.size
+
+    @staticmethod
+    async def process_avatar(avatar_content: bytes | str) -> dict[str, bytes]:
+        """Добавляет водяной знак и готовит набор копий аватара.
+
+        avatar_content - содержимое или путь к файлу (процессу пула лучше
+        передавать путь). Ключи: "original" (PNG не больше AVATAR_MAX_SIDE) и
+        "<размер>.<формат>" для каждого размера из AVATAR_SIZES в WebP и JPEG.
+        Декодирование, наложение знака и кодирование выполняются в пуле
+        процессов.
+        """
+        return await image_pool.run(ImageProcessor.render_avatar, avatar_content)
 
     @staticmethod
-    def _add_watermark(
-        original_image: Image.Image, watermark_image: Image.Image, position=(0, 0)
-    ) -> Image.Image:
-        original_copy = original_image.copy()
-        original_copy.paste(watermark_image, position, watermark_image)
-        return original_copy
+    def _add_watermark(original_image: Image.Image) -> Image.Image:
+        return watermark_cache.apply(original_image)
+
+    @classmethod
+    def render_avatar(cls, avatar_content: bytes | str) -> dict[str, bytes]:
+        if isinstance(avatar_content, bytes):
+            avatar_content = io.BytesIO(avatar_content)
+        max_side = app_settings.AVATAR_MAX_SIDE
+        with Image.open(avatar_content) as original_image:
+            cls.check_dimensions(original_image.size)
+            # JPEG декодируется сразу в масштабе 1/2, 1/4 или 1/8 (не меньше max_side),
+            # остальные форматы уменьшаются через reduce перед точным ресэмплингом
+            original_image.draft(None, (max_side, max_side))
+            original_image.thumbnail((max_side, max_side), Image.LANCZOS, 3.0)
+            image = cls._add_watermark(original_image.convert("RGBA"))
+        renditions = {"original": cls._encode(image, "PNG")}
+        current = image
+        # От большего к меньшему: каждая копия уменьшается из предыдущей
+        for size in sorted(app_settings.AVATAR_SIZES, reverse=True):
+            if max(current.size) > size:
+                current = current.copy()
+                current.thumbnail((size, size), Image.LANCZOS)
+            for extension, (image_format, params) in cls.rendition_formats.items():
+                renditions[cls.rendition_key(size, extension)] = cls._encode(
+                    current, image_format, **params
+                )
+        return renditions
 
     @staticmethod
-    async def process_avatar(avatar_content: bytes) -> bytes:
-        """Обрабатывает аватар, добавляя водяной знак."""
-        original_image = Image.open(io.BytesIO(avatar_content)).convert("RGBA")
-        watermark_image = Image.open("watermark/water.jpg").convert("RGBA")
+    def rendition_key(size: int, extension: str) -> str:
+        return f"{size}.{extension}"
 
-        watermarked_image = await ImageProcessor.add_watermark_async(
-            original_image, watermark_image
-        )
+    @classmethod
+    def choose_rendition(
+        cls, renditions: dict[str, str], size: int, accept: str | None
+    ) -> str | None:
+        """Хэш наименьшей копии не меньше size в формате, который принимает клиент."""
+        sizes = sorted({int(key.split(".")[0]) for key in renditions})
+        if not sizes:
+            return None
+        chosen = next((value for value in sizes if value >= size), sizes[-1])
+        extension = "webp" if accepts(accept, "image/webp") else "jpeg"
+        return renditions.get(cls.rendition_key(chosen, extension))
 
+    @staticmethod
+    def _encode(image: Image.Image, image_format: str, **params) -> bytes:
+        if image_format == "JPEG" and image.mode != "RGB":
+            # В JPEG нет прозрачности: подкладываем белый фон
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
         img_byte_arr = io.BytesIO()
-        watermarked_image.save(img_byte_arr, format="PNG")
+        image.save(img_byte_arr, format=image_format, **params)
         return img_byte_arr.getvalue()
@@ -0,0 +1,121 @@
+import asyncio
+import sys
+import time
+from typing import Any, Optional
+
+from cachetools import TLRUCache
+from loguru import logger
+
+from src.app_config.config_redis import RedisRepository
+from src.app.utils.metrics import metrics
+
+
+def deep_sizeof(value: Any) -> int:
+    """Приблизительный размер объекта в памяти вместе с вложенными."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class LocalCache:
+    """Кэш L1 в памяти процесса перед Redis.
+
+    Ограничен суммарным размером значений (max_bytes, по deep_sizeof) и
+    временем жизни записи. Согласованность между воркерами и узлами держится
+    через канал pub/sub Redis: сообщение с префиксом удаляет все ключи с этим
+    префиксом во всех процессах. Если подписка обрывалась, кэш очищается
+    целиком - пропущенные сообщения не восстановить. Пока подписки нет
+    (Redis недоступен или start не вызывался), кэш не используется: иначе
+    изменения из других процессов не были бы видны до истечения ttl.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, channel: str):
+        self.ttl = ttl
+        self.channel = channel
+        # Значение хранится как (объект, срок годности, размер)
+        self._cache = TLRUCache(
+            maxsize=max_bytes,
+            ttu=lambda _key, item, _now: item[1],
+            timer=time.time,
+            getsizeof=lambda item: item[2],
+        )
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = False
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self._subscribed:
+            return None
+        item = self._cache.get(key)
+        if item is None:
+            metrics.increment("cache.l1.misses")
+            return None
+        metrics.increment("cache.l1.hits")
+        return item[0]
+
+    def set(self, key: str, value: Any, expires: Optional[float] = None) -> None:
+        """Кладёт значение не дольше ttl и не дольше expires (время UNIX)."""
+        if not self._subscribed:
+            return
+        deadline = time.time() + self.ttl
+        if expires is not None:
+            deadline = min(deadline, expires)
+        try:
+            self._cache[key] = (value, deadline, deep_sizeof(value))
+        except ValueError:
+            # Значение больше всего кэша
+            pass
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._cache if key.startswith(prefix)]:
+            self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def size(self) -> int:
+        return self._cache.currsize
+
+    async def publish_invalidation(
+        self, redis_repo: RedisRepository, prefix: str
+    ) -> None:
+        self.invalidate_prefix(prefix)
+        await redis_repo.publish(self.channel, prefix)
+
+    def start(self, redis_repo: RedisRepository) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis_repo))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self, redis_repo: RedisRepository) -> None:
+        while True:
+            pubsub = redis_repo.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Сообщения, пришедшие до подписки, потеряны
+                self.clear()
+                self._subscribed = True
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self.invalidate_prefix(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation channel is unavailable: {e}")
+                self._subscribed = False
+                self.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                self._subscribed = False
+                await pubsub.reset()
@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class TimingStats:
+    """Число измерений, сумма и максимум (в секундах)."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Metrics:
+    """Счётчики и тайминги процесса для /metrics."""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._timings: Dict[str, TimingStats] = defaultdict(TimingStats)
+        # Измерения приходят и из пулов потоков
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._timings[name].observe(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {
+                    name: stats.snapshot() for name, stats in self._timings.items()
+                },
+            }
+
+
+metrics = Metrics()
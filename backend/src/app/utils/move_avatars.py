@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+
+from sqlalchemy import select, update
+
+from src.app.models.client import ClientORM
+from src.app.utils.blob_store import BlobStore, blob_store
+from src.app.utils.unitofwork import UnitOfWork
+
+
+async def move_avatars(store: BlobStore = blob_store, batch_size: int = 100) -> int:
+    """Переносит аватары из clients.avatar в хранилище пачками.
+
+    Каждая пачка - отдельная транзакция: файл пишется до обновления строки,
+    поэтому прерванный перенос можно просто запустить заново.
+    """
+    moved = 0
+    while True:
+        uow = UnitOfWork()
+        async with uow:
+            stmt = (
+                select(ClientORM.id, ClientORM.avatar)
+                .where(ClientORM.avatar.isnot(None), ClientORM.avatar_hash.is_(None))
+                .order_by(ClientORM.id)
+                .limit(batch_size)
+            )
+            rows = (await uow.session.execute(stmt)).all()
+            if not rows:
+                return moved
+            for client_id, avatar in rows:
+                avatar_hash = await store.put(avatar)
+                await uow.session.execute(
+                    update(ClientORM)
+                    .where(ClientORM.id == client_id)
+                    .values(avatar_hash=avatar_hash, avatar=None)
+                )
+            await uow.commit()
+        moved += len(rows)
+        print(f"Moved {moved} avatars")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move avatars out of Postgres")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(move_avatars(batch_size=args.batch_size))
@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Tuple
+
+SORT_FIELDS = ("creation_date", "name", "surname")
+SORT_ORDERS = ("asc", "desc")
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, client_id: int) -> str:
+    """Непрозрачный курсор: позиция (значение поля сортировки, id) последней строки."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, client_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """Разбирает курсор; курсор от другой сортировки считается недействительным."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_sort_order, value, client_id = json.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+        if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+            raise ValueError
+        if sort_by == "creation_date":
+            value = date.fromisoformat(value)
+        return value, int(client_id)
+    except (ValueError, TypeError):
+        raise ValueError("Недействительный курсор.")
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+
+from src.app_config.app_settings import app_settings
+from src.app.utils.metrics import metrics
+
+
+class PasswordHasher:
+    """bcrypt в отдельном пуле потоков, чтобы не блокировать цикл событий.
+
+    bcrypt отпускает GIL, поэтому потоков достаточно; размер пула - потолок
+    одновременных хэширований, остальные запросы ждут в очереди пула. Время
+    ожидания и самого хэширования пишется в metrics.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(
+            bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds)
+        )
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(
+            bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8")
+        )
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Хэш посчитан с другой стоимостью, чем задана в настройках."""
+        try:
+            # $2b$12$<соль и хэш>
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    async def _run(self, func: Callable, *args):
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            metrics.observe("bcrypt.queue_wait", started - submitted)
+            try:
+                return func(*args)
+            finally:
+                metrics.observe("bcrypt.hash_time", time.perf_counter() - started)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, call)
+
+
+password_hasher = PasswordHasher(
+    rounds=app_settings.BCRYPT_ROUNDS, workers=app_settings.BCRYPT_WORKERS
+)
@@ -0,0 +1,56 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from src.app_config.app_settings import app_settings
+
+
+class ProcessPool:
+    """Пул процессов для тяжёлой работы с изображениями.
+
+    В пул одновременно передаётся не больше workers задач: остальные ждут на
+    семафоре в цикле событий, а не во внутренней (неограниченной) очереди
+    ProcessPoolExecutor. Без запущенного пула (скрипты, тесты) функции
+    выполняются в потоке.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn: дочерние процессы не наследуют потоки и соединения приложения
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = self._create_executor()
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self._executor is None:
+            return await asyncio.to_thread(func, *args)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._executor, func, *args)
+            except BrokenProcessPool:
+                # Процесс упал (например, OOM): пул пересоздаётся для следующих задач
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+                raise
+
+
+image_pool = ProcessPool(workers=app_settings.IMAGE_POOL_WORKERS)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from src.app_config.config_redis import RedisRepository
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов «ведро токенов».
+
+    Токены пополняются со скоростью rate в секунду, но не больше capacity.
+    Корутины, которым не хватило токена, ждут своей очереди (asyncio.Lock
+    отдаёт блокировку в порядке FIFO), а не получают ошибку.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+# KEYS: окно (ZSET отметок времени), маркер загрузки окна
+# ARGV: длина окна (мс), лимит, уникальная отметка
+# Время берётся у Redis: часы серверов приложения могут расходиться
+ACQUIRE_SCRIPT = """
+local state = redis.call('GET', KEYS[2])
+if not state then
+    return -1
+end
+if state ~= 'ready' then
+    return -2
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+redis.call('PEXPIRE', KEYS[2], window)
+return 1
+"""
+
+# ARGV: отметка захвата загрузки, длина окна (мс), затем пары (время, значение)
+SEED_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if #ARGV > 2 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+redis.call('SET', KEYS[2], 'ready', 'PX', ARGV[2])
+return 1
+"""
+
+
+class SlidingWindowLimiter:
+    """Не больше limit событий за скользящее окно window секунд на ключ (Redis).
+
+    Проверка и учёт события - один Lua-скрипт, то есть один round-trip и
+    никаких гонок между параллельными запросами. Окно - ZSET отметок времени
+    по часам Redis. Если окна в Redis ещё нет (первый запрос, рестарт Redis),
+    прошлые события загружаются через load_history, например из БД: загрузку
+    выполняет тот, кто захватил маркер (SET NX на load_lease секунд), а
+    остальные ждут её окончания.
+    """
+
+    MISSING = -1
+    LOADING = -2
+
+    def __init__(
+        self,
+        redis_repo: RedisRepository,
+        prefix: str,
+        limit: int,
+        window: float,
+        load_lease: float = 5.0,
+        poll_interval: float = 0.05,
+    ):
+        self.redis_repo = redis_repo
+        self.prefix = prefix
+        self.limit = limit
+        self.window_ms = int(window * 1000)
+        self.load_lease = load_lease
+        self.poll_interval = poll_interval
+        self._acquire = redis_repo.script(ACQUIRE_SCRIPT)
+        self._seed = redis_repo.script(SEED_SCRIPT)
+
+    def keys(self, name: str) -> List[str]:
+        # Общий hash tag: оба ключа попадают в один слот Redis Cluster
+        return [f"{self.prefix}:{{{name}}}:window", f"{self.prefix}:{{{name}}}:loaded"]
+
+    async def acquire(
+        self,
+        name: str,
+        load_history: Callable[[], Awaitable[Iterable[float]]],
+    ) -> Optional[str]:
+        """Занимает слот и возвращает его отметку; None - лимит исчерпан."""
+        token = uuid.uuid4().hex
+        keys = self.keys(name)
+        while True:
+            result = await self._acquire(
+                keys=keys, args=[self.window_ms, self.limit, token]
+            )
+            if result == 1:
+                return token
+            if result == 0:
+                return None
+            if result == self.MISSING:
+                claim = uuid.uuid4().hex
+                if await self.redis_repo.add_if_absent(keys[1], claim, self.load_lease):
+                    await self._load(keys, claim, await load_history())
+                    continue
+            # Окно загружает другой запрос; если он упал, маркер истечёт
+            await asyncio.sleep(self.poll_interval)
+
+    async def _load(
+        self, keys: List[str], claim: str, timestamps: Iterable[float]
+    ) -> None:
+        args = [claim, self.window_ms]
+        for timestamp in timestamps:
+            args += [int(timestamp * 1000), uuid.uuid4().hex]
+        await self._seed(keys=keys, args=args)
+
+    async def release(self, name: str, token: str) -> None:
+        """Возвращает слот, если событие не состоялось."""
+        await self.redis_repo.remove_from_set(self.keys(name)[0], token)
@@ -0,0 +1,160 @@
+import time
+from collections import defaultdict
+from math import floor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.app.schemas.enums import GenderEnum
+from src.app_config.app_settings import app_settings
+from src.app.utils.calc_dist import distance_calculator
+
+
+class SpatialIndex:
+    """Сеточный индекс участников в памяти процесса.
+
+    Ячейка cell_size x cell_size градусов хранит множество id клиентов, а для
+    каждого id держатся (широта, долгота, пол). Поиск по радиусу перебирает
+    только ячейки, пересекающие ограничивающий прямоугольник, и уточняет
+    кандидатов векторной формулой гаверсинусов.
+    """
+
+    def __init__(self, cell_size: float = 0.5):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._points: Dict[int, Tuple[float, float, Optional[GenderEnum]]] = {}
+        # Наибольший id, прочитанный из БД при синхронизации
+        self.last_id = 0
+        self.loaded = False
+        self.synced_at = 0.0
+        self.reloaded_at = 0.0
+        # Поколение кэша списков, при котором индекс последний раз догружался
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return floor(latitude / self.cell_size), floor(longitude / self.cell_size)
+
+    def add(
+        self,
+        client_id: int,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        gender: Optional[GenderEnum] = None,
+    ) -> None:
+        self.remove(client_id)
+        if latitude is None or longitude is None:
+            return
+        self._points[client_id] = (latitude, longitude, gender)
+        self._cells[self._cell(latitude, longitude)].add(client_id)
+
+    def add_many(self, rows: Iterable) -> None:
+        """Добавляет строки, прочитанные из БД, и сдвигает last_id."""
+        for row in rows:
+            self.add(row.id, row.latitude, row.longitude, row.gender)
+            self.last_id = max(self.last_id, row.id)
+
+    def reload(self, rows: Iterable) -> None:
+        """Заменяет содержимое индекса полной выборкой из БД."""
+        self._cells.clear()
+        self._points.clear()
+        self.last_id = 0
+        self.add_many(rows)
+        self.reloaded_at = time.monotonic()
+
+    def sync_from(self, overlap: int) -> int:
+        """id, после которого читать строки при догрузке.
+
+        Id выдаются последовательностью раньше, чем транзакции фиксируются,
+        поэтому строка с id меньше last_id может появиться в БД уже после
+        синхронизации. Последние overlap id перечитываются каждый раз.
+        """
+        return max(self.last_id - overlap, 0)
+
+    def remove(self, client_id: int) -> None:
+        point = self._points.pop(client_id, None)
+        if point is None:
+            return
+        cell = self._cell(point[0], point[1])
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(client_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def query(
+        self,
+        origin: Tuple[float, float],
+        radius: float,
+        gender: Optional[GenderEnum] = None,
+    ) -> List[int]:
+        """Возвращает отсортированные id клиентов не дальше radius км от origin."""
+        candidates = [
+            client_id
+            for cell in self._cells_in_radius(origin, radius)
+            for client_id in self._cells[cell]
+            if gender is None or self._points[client_id][2] == gender
+        ]
+        if not candidates:
+            return []
+
+        mask = distance_calculator.within_radius(
+            origin,
+            [self._points[client_id][0] for client_id in candidates],
+            [self._points[client_id][1] for client_id in candidates],
+            radius,
+        )
+        return sorted(
+            client_id for client_id, inside in zip(candidates, mask) if inside
+        )
+
+    def _cells_in_radius(
+        self, origin: Tuple[float, float], radius: float
+    ) -> List[Tuple[int, int]]:
+        box = distance_calculator.bounding_box(origin, radius)
+        min_row, _ = self._cell(box.min_lat, 0.0)
+        max_row, _ = self._cell(box.max_lat, 0.0)
+        if box.crosses_antimeridian:
+            lon_ranges = [(box.min_lon, 180.0), (-180.0, box.max_lon)]
+        else:
+            lon_ranges = [(box.min_lon, box.max_lon)]
+        col_ranges = [
+            (self._cell(0.0, start)[1], self._cell(0.0, stop)[1])
+            for start, stop in lon_ranges
+        ]
+
+        requested = (max_row - min_row + 1) * sum(
+            stop - start + 1 for start, stop in col_ranges
+        )
+        if requested > len(self._cells):
+            # Радиус больше заполненной части сетки: дешевле пройти по занятым ячейкам
+            return [
+                (row, col)
+                for row, col in self._cells
+                if min_row <= row <= max_row
+                and any(start <= col <= stop for start, stop in col_ranges)
+            ]
+        return [
+            (row, col)
+            for row in range(min_row, max_row + 1)
+            for start, stop in col_ranges
+            for col in range(start, stop + 1)
+            if (row, col) in self._cells
+        ]
+
+    def is_stale(self, max_age: float) -> bool:
+        return time.monotonic() - self.synced_at > max_age
+
+    def needs_reload(self, max_age: float) -> bool:
+        return time.monotonic() - self.reloaded_at > max_age or not self.loaded
+
+    def is_behind(self, generation: int) -> bool:
+        return generation > self.generation
+
+    def mark_synced(self, generation: int = 0) -> None:
+        self.loaded = True
+        self.synced_at = time.monotonic()
+        self.generation = max(self.generation, generation)
+
+
+spatial_index = SpatialIndex(cell_size=app_settings.SPATIAL_INDEX_CELL_SIZE)
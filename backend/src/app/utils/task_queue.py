@@ -0,0 +1,66 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from src.app_config.config_redis import RedisRepository
+
+
+class TaskQueue(ABC):
+    """Очередь фоновых задач (словари, сериализуемые в JSON)."""
+
+    @abstractmethod
+    async def put(self, task: dict) -> None:
+        """Ставит задачу в очередь."""
+
+    @abstractmethod
+    async def get(self, timeout: float = 1.0) -> Optional[dict]:
+        """Берёт задачу; None, если за timeout секунд задач не появилось."""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Текущая длина очереди."""
+
+
+class RedisTaskQueue(TaskQueue):
+    """Общая для всех воркеров очередь на списке Redis (LPUSH / BRPOP)."""
+
+    def __init__(self, redis_repo: RedisRepository, name: str):
+        self.redis_repo = redis_repo
+        self.name = name
+
+    async def put(self, task: dict) -> None:
+        await self.redis_repo.push(self.name, json.dumps(task))
+
+    async def get(self, timeout: float = 1.0) -> Optional[dict]:
+        value = await self.redis_repo.pop_blocking(self.name, timeout)
+        return json.loads(value) if value is not None else None
+
+    async def size(self) -> int:
+        return await self.redis_repo.length(self.name)
+
+
+class LocalTaskQueue(TaskQueue):
+    """Очередь в памяти процесса - запасной вариант, если Redis недоступен."""
+
+    def __init__(self, maxsize: int = 0):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def put(self, task: dict) -> None:
+        await self._queue.put(task)
+
+    async def get(self, timeout: float = 1.0) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def size(self) -> int:
+        return self._queue.qsize()
+
+    def drain(self) -> List[dict]:
+        """Забирает все задачи, не дожидаясь новых."""
+        tasks = []
+        while not self._queue.empty():
+            tasks.append(self._queue.get_nowait())
+        return tasks
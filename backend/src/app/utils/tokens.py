@@ -0,0 +1,86 @@
+import time
+from typing import Optional
+
+import jwt
+from cachetools import TLRUCache
+
+from src.app_config.app_settings import app_settings
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenManager:
+    """Подписанные JWT: короткий access и долгий refresh.
+
+    Проверка идёт только в процессе (подпись и срок), без БД и bcrypt.
+    Уже проверенные access-токены кладутся в небольшой кэш, запись живёт не
+    дольше cache_ttl и не дольше срока самого токена.
+    """
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        access_ttl: int,
+        refresh_ttl: int,
+        cache_size: int = 10000,
+        cache_ttl: int = 60,
+    ):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.cache_ttl = cache_ttl
+        # Таймер - время UNIX, чтобы сравнивать его с exp из токена
+        self._verified = TLRUCache(
+            maxsize=cache_size, ttu=self._time_to_use, timer=time.time
+        )
+
+    def _time_to_use(self, _key: str, claims: dict, now: float) -> float:
+        return min(now + self.cache_ttl, claims["exp"])
+
+    def create_access_token(self, client_id: int) -> str:
+        return self._encode(client_id, ACCESS, self.access_ttl)
+
+    def create_refresh_token(self, client_id: int) -> str:
+        return self._encode(client_id, REFRESH, self.refresh_ttl)
+
+    def _encode(self, client_id: int, token_type: str, ttl: int) -> str:
+        now = int(time.time())
+        claims = {
+            "sub": str(client_id),
+            "type": token_type,
+            "iat": now,
+            "exp": now + ttl,
+        }
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def verify(self, token: str, token_type: str = ACCESS) -> int:
+        """Возвращает id клиента; ValueError, если токен недействителен."""
+        claims: Optional[dict] = self._verified.get(token)
+        if claims is None:
+            try:
+                claims = jwt.decode(
+                    token,
+                    self.secret_key,
+                    algorithms=[self.algorithm],
+                    options={"require": ["sub", "type", "exp"]},
+                )
+            except jwt.PyJWTError:
+                raise ValueError("Недействительный или просроченный токен.")
+            if token_type == ACCESS:
+                self._verified[token] = claims
+        if claims["type"] != token_type:
+            raise ValueError("Недействительный или просроченный токен.")
+        return int(claims["sub"])
+
+
+token_manager = TokenManager(
+    secret_key=app_settings.SECRET_KEY,
+    algorithm=app_settings.ALGORITHM,
+    access_ttl=app_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    refresh_ttl=app_settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+    cache_size=app_settings.TOKEN_CACHE_SIZE,
+    cache_ttl=app_settings.TOKEN_CACHE_TTL,
+)
@@ -0,0 +1,110 @@
+import threading
+from typing import Literal, Tuple
+
+from cachetools import LRUCache
+from PIL import Image
+
+from src.app_config.app_settings import app_settings
+
+Placement = Literal["top-left", "top-right", "bottom-left", "bottom-right", "center"]
+
+
+class WatermarkCache:
+    """Водяной знак, загруженный один раз, и его копии под размеры аватаров.
+
+    Исходник хранится с предумноженной альфой (RGBa): при масштабировании в
+    таком виде цвета прозрачных пикселей не «протекают» на края. Готовые
+    копии (уже с учётом прозрачности) лежат в LRU по ширине знака, которая
+    округляется до step пикселей, чтобы близкие размеры аватаров делили копию.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        scale: float = 0.25,
+        opacity: float = 0.5,
+        placement: Placement = "bottom-right",
+        margin: float = 0.02,
+        step: int = 16,
+        maxsize: int = 32,
+    ):
+        self.path = path
+        self.scale = scale
+        self.opacity = opacity
+        self.placement = placement
+        self.margin = margin
+        self.step = step
+        self._source: Image.Image | None = None
+        self._variants: LRUCache = LRUCache(maxsize=maxsize)
+        # Копии строятся из пула потоков
+        self._lock = threading.Lock()
+
+    @property
+    def source(self) -> Image.Image:
+        if self._source is None:
+            with self._lock:
+                if self._source is None:
+                    with Image.open(self.path) as image:
+                        self._source = image.convert("RGBA").convert("RGBa")
+        return self._source
+
+    def variant(self, width: int) -> Image.Image:
+        """Знак шириной width (с округлением до step) в режиме RGBA."""
+        width = max(self.step, round(width / self.step) * self.step)
+        with self._lock:
+            cached = self._variants.get(width)
+        if cached is not None:
+            return cached
+
+        source = self.source
+        height = max(1, round(source.height * width / source.width))
+        scaled = source.resize((width, height), Image.LANCZOS).convert("RGBA")
+        if self.opacity < 1:
+            alpha = scaled.getchannel("A").point(
+                lambda value: round(value * self.opacity)
+            )
+            scaled.putalpha(alpha)
+        with self._lock:
+            self._variants[width] = scaled
+        return scaled
+
+    def apply(self, image: Image.Image) -> Image.Image:
+        """Накладывает знак на image (RGBA, изменяется на месте) одной композицией."""
+        width = min(image.width, max(1, round(image.width * self.scale)))
+        watermark = self.variant(width)
+        if watermark.width > image.width or watermark.height > image.height:
+            watermark = watermark.crop(
+                (
+                    0,
+                    0,
+                    min(watermark.width, image.width),
+                    min(watermark.height, image.height),
+                )
+            )
+        image.alpha_composite(watermark, dest=self._position(image, watermark))
+        return image
+
+    def _position(self, image: Image.Image, watermark: Image.Image) -> Tuple[int, int]:
+        margin = round(min(image.size) * self.margin)
+        right = max(0, image.width - watermark.width - margin)
+        bottom = max(0, image.height - watermark.height - margin)
+        left = min(margin, right)
+        top = min(margin, bottom)
+        return {
+            "top-left": (left, top),
+            "top-right": (right, top),
+            "bottom-left": (left, bottom),
+            "bottom-right": (right, bottom),
+            "center": (
+                (image.width - watermark.width) // 2,
+                (image.height - watermark.height) // 2,
+            ),
+        }[self.placement]
+
+
+watermark_cache = WatermarkCache(
+    app_settings.WATERMARK_PATH,
+    scale=app_settings.WATERMARK_SCALE,
+    opacity=app_settings.WATERMARK_OPACITY,
+    placement=app_settings.WATERMARK_PLACEMENT,
+)
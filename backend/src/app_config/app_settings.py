@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
 
@@ -20,6 +20,59 @@ class AppSettings(BaseSettings):
     METHODS: List[str]
     HEADERS: List[str]
     ALGORITHM: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Кэш уже проверенных access-токенов
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 60
+    BCRYPT_ROUNDS: int = 12
+    # Потолок одновременных вычислений bcrypt в процессе
+    BCRYPT_WORKERS: int = 2
+    SPATIAL_INDEX_CELL_SIZE: float = 0.5
+    SPATIAL_INDEX_REFRESH_SECONDS: float = 5.0
+    # Сколько последних id перечитывать при догрузке и как часто читать всё
+    SPATIAL_INDEX_SYNC_OVERLAP: int = 1000
+    SPATIAL_INDEX_RELOAD_SECONDS: float = 600.0
+    LIST_PAGE_SIZE: int = 50
+    LIST_MAX_PAGE_SIZE: int = 200
+    # Страницы сбрасываются сменой поколения, TTL лишь ограничивает мусор
+    LIST_CACHE_TTL: int = 6 * 3600
+    # Сколько после TTL страница ещё отдаётся, пока один процесс её пересчитывает
+    LIST_CACHE_STALE_TTL: int = 300
+    LIST_CACHE_LOCK_LEASE: float = 5.0
+    # Округление точки поиска (знаков после запятой, 3 - около 100 м) и радиуса (км)
+    LIST_CACHE_GEO_PRECISION: int = 3
+    LIST_CACHE_DISTANCE_PRECISION: int = 1
+    # Кэш L1 в памяти каждого процесса
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL: float = 30.0
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    # Лимит лайков в скользящем окне
+    LIKE_DAILY_LIMIT: int = 5
+    LIKE_WINDOW_SECONDS: int = 24 * 3600
+    AVATAR_CACHE_MAX_AGE: int = 365 * 24 * 3600
+    AVATAR_SIZES: List[int] = [64, 256, 1024]
+    # Число фоновых обработчиков аватаров в каждом процессе
+    AVATAR_WORKERS: int = 2
+    IMAGE_POOL_WORKERS: int = 2
+    # Сверх стольких принятых и ещё не обработанных аватаров загрузка
+    # отклоняется с 503
+    AVATAR_QUEUE_DEPTH: int = 100
+    # Слот, не возвращённый за это время (процесс упал), перестаёт считаться
+    AVATAR_SLOT_LEASE: int = 15 * 60
+    AVATAR_RETRY_AFTER: int = 10
+    AVATAR_MAX_BYTES: int = 10 * 1024 * 1024
+    # Защита от «бомб»: число пикселей проверяется по заголовку до декодирования
+    AVATAR_MAX_PIXELS: int = 40_000_000
+    # Больше этой стороны исходник уменьшается уже при декодировании
+    AVATAR_MAX_SIDE: int = 2048
+    WATERMARK_PATH: str = "watermark/water.jpg"
+    # Ширина знака относительно ширины аватара
+    WATERMARK_SCALE: float = 0.25
+    WATERMARK_OPACITY: float = 0.5
+    WATERMARK_PLACEMENT: Literal[
+        "top-left", "top-right", "bottom-left", "bottom-right", "center"
+    ] = "bottom-right"
     origins: List[str] = [
         "http://localhost:3000",
         "http://localhost:3300",
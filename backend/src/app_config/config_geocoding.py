@@ -0,0 +1,31 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class GeocodingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file="../.env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        case_sensitive=False,
+        env_prefix="GEOCODING__",
+    )
+    BASE_URL: str = "https://nominatim.openstreetmap.org/search"
+    USER_AGENT: str = "TestFA/0.1.0"
+    CONNECT_TIMEOUT: float = 3.0
+    READ_TIMEOUT: float = 5.0
+    MAX_CONNECTIONS: int = 10
+    MAX_RETRIES: int = 3
+    BACKOFF_BASE: float = 0.5
+    # Политика Nominatim: не больше одного запроса в секунду
+    RATE_LIMIT: float = 1.0
+    RATE_BURST: int = 1
+    LOCAL_CACHE_SIZE: int = 1024
+    LOCAL_CACHE_TTL: int = 3600
+    REDIS_CACHE_TTL: int = 30 * 24 * 3600
+    NEGATIVE_CACHE_TTL: int = 600
+    GAZETTEER_PATH: Optional[str] = "data/gazetteer.bin"
+
+
+geocoding_settings = GeocodingSettings()
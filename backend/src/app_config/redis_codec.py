@@ -0,0 +1,125 @@
+import pickle
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+import zstandard
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Заголовок записи: версия формата, id сериализатора, id сжатия
+FORMAT_VERSION = 1
+HEADER_SIZE = 3
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default)
+
+
+# id -> (имя, dumps, loads); id пишутся в заголовок и не должны меняться
+SERIALIZERS: Dict[int, Tuple[str, Callable, Callable]] = {
+    1: ("orjson", _orjson_dumps, orjson.loads),
+    2: ("msgpack", _msgpack_dumps, _msgpack_loads),
+}
+
+COMPRESSORS: Dict[int, Tuple[str, Optional[Callable], Optional[Callable]]] = {
+    0: ("none", None, None),
+    1: (
+        "zstd",
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdDecompressor().decompress,
+    ),
+    2: (
+        "lz4",
+        lz4_frame.compress if lz4_frame else None,
+        lz4_frame.decompress if lz4_frame else None,
+    ),
+}
+
+
+def _find(table: dict, name: str) -> int:
+    for key, (entry_name, *_) in table.items():
+        if entry_name == name:
+            return key
+    raise ValueError(f"Unknown codec {name!r}")
+
+
+class CacheCodec:
+    """Сериализация объектов кэша с заголовком версии.
+
+    Запись: [версия][сериализатор][сжатие] + данные. Сжимаются только данные
+    больше compression_threshold байт. Записи чужой версии (в том числе
+    старые записи pickle) при чтении считаются промахом, поэтому смена
+    формата при деплое не требует очистки Redis.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "orjson",
+        compression: str = "zstd",
+        compression_threshold: int = 1024,
+    ):
+        self.serializer_id = _find(SERIALIZERS, serializer)
+        self.compression_id = _find(COMPRESSORS, compression)
+        if serializer == "msgpack" and msgpack is None:
+            raise ValueError("msgpack is not installed")
+        if self.compression_id and COMPRESSORS[self.compression_id][1] is None:
+            raise ValueError(f"{compression} is not installed")
+        self.compression_threshold = compression_threshold
+
+    def dumps(self, value: Any) -> bytes:
+        _, dumps, _ = SERIALIZERS[self.serializer_id]
+        data = dumps(value)
+        compression_id = 0
+        if self.compression_id and len(data) > self.compression_threshold:
+            compression_id = self.compression_id
+            data = COMPRESSORS[compression_id][1](data)
+        return bytes((FORMAT_VERSION, self.serializer_id, compression_id)) + data
+
+    def loads(self, data: Optional[bytes]) -> Optional[Any]:
+        if not data or len(data) < HEADER_SIZE or data[0] != FORMAT_VERSION:
+            return None
+        serializer = SERIALIZERS.get(data[1])
+        compressor = COMPRESSORS.get(data[2])
+        if serializer is None or compressor is None:
+            return None
+        payload = memoryview(data)[HEADER_SIZE:]
+        if data[2]:
+            if compressor[2] is None:
+                return None
+            payload = compressor[2](payload)
+        return serializer[2](payload)
+
+
+class PickleCodec:
+    """Прежний формат без заголовка; только для сравнения в бенчмарке."""
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    @staticmethod
+    def loads(data: Optional[bytes]) -> Optional[Any]:
+        return pickle.loads(data) if data else None
@@ -1,11 +1,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from loguru import logger
 
 from starlette import status
 
-from src.app_config.config_redis import RedisRepository
-from src.redisrepo.dependencies import get_redis_repo
+from redis.exceptions import RedisError
+
+from src.redisrepo.dependencies import close_redis_repo, get_redis_repo
+from src.app.services.avatar import AvatarService
+from src.app.services.client import ClientService, local_cache
+from src.app.utils.geocoding import geocoding_service
+from src.app.utils.password_hasher import password_hasher
+from src.app.utils.process_pool import image_pool
 
 from .app.api.router import router as api_router
 from src.app_config.app_settings import app_settings
@@ -29,11 +36,32 @@ def bind_events(app: FastAPI) -> None:
         db = database_accessor
         await db.run()
         app.state.db = db
-        get_redis_repo.redis_repo = await RedisRepository.connect()
+        try:
+            redis_repo = await get_redis_repo()
+        except RedisError as e:
+            # Кэш и общая очередь недоступны; подключение повторится при обращении
+            logger.warning(f"Redis is unavailable: {e}")
+            redis_repo = None
+        await geocoding_service.start()
+        image_pool.start()
+        await AvatarService.start(redis_repo)
+        if redis_repo is not None:
+            local_cache.start(redis_repo)
+        try:
+            await ClientService.load_spatial_index()
+        except Exception as e:
+            # Без индекса поиск по радиусу идёт через SQL
+            logger.warning(f"Spatial index was not loaded: {e}")
 
     @app.on_event("shutdown")
     async def close_engine():
+        await AvatarService.stop()
+        await local_cache.stop()
+        image_pool.stop()
+        password_hasher.stop()
+        await close_redis_repo()
         await app.state.db.stop()
+        await geocoding_service.stop()
 
 
 def get_app() -> FastAPI:
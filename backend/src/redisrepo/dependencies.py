@@ -1,5 +1,43 @@
+import asyncio
+import time
+
+from redis.exceptions import ConnectionError
+
 from src.app_config.config_redis import RedisRepository
 
+# Пауза перед новой попыткой подключения, если Redis был недоступен
+RECONNECT_INTERVAL = 5.0
+
+# Одновременные запросы не создают каждый свой пул
+_connect_lock = asyncio.Lock()
+
 
 async def get_redis_repo() -> RedisRepository:
-    return await RedisRepository.connect()
+    """Общий на процесс RedisRepository (один пул соединений).
+
+    Создаётся при старте приложения; если Redis тогда был недоступен,
+    подключение повторяется при обращении, но не чаще RECONNECT_INTERVAL.
+    """
+    if get_redis_repo.redis_repo is not None:
+        return get_redis_repo.redis_repo
+    async with _connect_lock:
+        # Пока ждали блокировку, подключение мог создать другой запрос
+        if get_redis_repo.redis_repo is None:
+            if time.monotonic() < get_redis_repo.retry_at:
+                raise ConnectionError("Redis is unavailable")
+            try:
+                get_redis_repo.redis_repo = await RedisRepository.connect()
+            except Exception:
+                get_redis_repo.retry_at = time.monotonic() + RECONNECT_INTERVAL
+                raise
+    return get_redis_repo.redis_repo
+
+
+get_redis_repo.redis_repo = None
+get_redis_repo.retry_at = 0.0
+
+
+async def close_redis_repo() -> None:
+    if get_redis_repo.redis_repo is not None:
+        await get_redis_repo.redis_repo.disconnect()
+        get_redis_repo.redis_repo = None
@@ -0,0 +1,20 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# Настройки читаются из окружения при импорте модулей; без .env тесты
+# берут значения по умолчанию из env.template
+ENV_TEMPLATE = Path(__file__).resolve().parent.parent / "env.template"
+
+for line in ENV_TEMPLATE.read_text().splitlines():
+    line = line.strip()
+    if line and not line.startswith("#") and "=" in line:
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key.strip(), value.strip().strip('"'))
+
+
+@pytest.fixture
+def anyio_backend():
+    # Приложение работает на asyncio
+    return "asyncio"
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.app.utils.cache_loader import CacheLoader
+from src.app_config.config_redis import RedisRepository
+from src.app_config.redis_codec import CacheCodec
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis_repo():
+    return RedisRepository(fakeredis.aioredis.FakeRedis(), codec=CacheCodec())
+
+
+class SlowCompute:
+    """compute, который ждёт release и считает вызовы."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+async def wait_for_value(loader, redis_repo, key, compute, expected):
+    for _ in range(100):
+        if await loader.get_or_compute(redis_repo, key, compute, ttl=60) == expected:
+            return
+        await asyncio.sleep(0.01)
+    pytest.fail(f"{key} was not refreshed")
+
+
+async def test_concurrent_misses_compute_once(redis_repo):
+    loader = CacheLoader(poll_interval=0.01)
+    compute = SlowCompute("value")
+
+    tasks = [
+        asyncio.create_task(loader.get_or_compute(redis_repo, "key", compute, ttl=60))
+        for _ in range(10)
+    ]
+    await compute.started.wait()
+    compute.release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 10
+    assert compute.calls == 1
+    assert await loader.get_or_compute(redis_repo, "key", compute, ttl=60) == "value"
+    assert compute.calls == 1
+
+
+async def test_refresh_window_serves_stale_value(redis_repo):
+    loader = CacheLoader(poll_interval=0.01)
+    await redis_repo.add_one_obj(
+        "key", {"value": "old", "delta": 0.1, "expires": time.time() - 1}, ttl=60
+    )
+    compute = SlowCompute("new")
+
+    # Пересчёт ещё не закончен, но никто его не ждёт
+    try:
+        values = await asyncio.wait_for(
+            asyncio.gather(
+                *[
+                    loader.get_or_compute(redis_repo, "key", compute, ttl=60)
+                    for _ in range(10)
+                ]
+            ),
+            timeout=1.0,
+        )
+    finally:
+        compute.release.set()
+    assert values == ["old"] * 10
+
+    await wait_for_value(loader, redis_repo, "key", compute, "new")
+    assert compute.calls == 1
+
+
+async def test_fresh_entry_is_not_recomputed(redis_repo):
+    loader = CacheLoader(poll_interval=0.01)
+    await redis_repo.add_one_obj(
+        "key", {"value": "cached", "delta": 0.0, "expires": time.time() + 60}, ttl=60
+    )
+    compute = SlowCompute("new")
+
+    assert await loader.get_or_compute(redis_repo, "key", compute, ttl=60) == "cached"
+    assert compute.calls == 0
+
+
+async def test_failed_refresh_keeps_stale_value(redis_repo):
+    loader = CacheLoader(poll_interval=0.01)
+    await redis_repo.add_one_obj(
+        "key", {"value": "old", "delta": 0.1, "expires": time.time() - 1}, ttl=60
+    )
+    compute = SlowCompute(RuntimeError("database is down"))
+
+    try:
+        value = await asyncio.wait_for(
+            loader.get_or_compute(redis_repo, "key", compute, ttl=60), timeout=1.0
+        )
+    finally:
+        compute.release.set()
+    assert value == "old"
+    await asyncio.sleep(0.05)
+
+    # Ошибка фоновой задачи не доходит до вызывающих
+    assert await loader.get_or_compute(redis_repo, "key", compute, ttl=60) == "old"
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+# Lua-скрипты в fakeredis исполняются через lupa
+pytest.importorskip("lupa")
+
+from src.app.utils.rate_limiter import SlidingWindowLimiter
+from src.app_config.config_redis import RedisRepository
+from src.app_config.redis_codec import CacheCodec
+
+pytestmark = pytest.mark.anyio
+
+WINDOW = 24 * 3600
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.aioredis.FakeRedis()
+
+
+@pytest.fixture
+def limiter(redis):
+    redis_repo = RedisRepository(redis, codec=CacheCodec())
+    return SlidingWindowLimiter(
+        redis_repo, prefix="likes", limit=3, window=WINDOW, poll_interval=0.01
+    )
+
+
+def history(*timestamps):
+    calls = []
+
+    async def load():
+        calls.append(None)
+        # Загрузка из БД не мгновенна: остальные запросы успевают прийти
+        await asyncio.sleep(0.05)
+        return list(timestamps)
+
+    load.calls = calls
+    return load
+
+
+async def test_limit_at_boundary(limiter):
+    load = history()
+
+    tokens = [await limiter.acquire("1", load) for _ in range(3)]
+
+    assert all(tokens)
+    assert await limiter.acquire("1", load) is None
+
+
+async def test_concurrent_acquires_do_not_exceed_limit(limiter):
+    load = history()
+
+    tokens = await asyncio.gather(*[limiter.acquire("1", load) for _ in range(20)])
+
+    assert len([token for token in tokens if token]) == 3
+    assert len(load.calls) == 1
+
+
+async def test_release_frees_slot(limiter):
+    load = history()
+    tokens = [await limiter.acquire("1", load) for _ in range(3)]
+
+    await limiter.release("1", tokens[0])
+
+    assert await limiter.acquire("1", load) is not None
+    assert await limiter.acquire("1", load) is None
+
+
+async def test_seeded_history_counts_towards_limit(limiter):
+    now = time.time()
+    # Два лайка в окне, один уже за его пределами
+    load = history(now - 3600, now - 60, now - WINDOW - 60)
+
+    tokens = await asyncio.gather(*[limiter.acquire("1", load) for _ in range(5)])
+
+    assert len([token for token in tokens if token]) == 1
+    assert len(load.calls) == 1
+
+
+async def test_users_have_separate_windows(limiter):
+    load = history()
+    for _ in range(3):
+        await limiter.acquire("1", load)
+
+    assert await limiter.acquire("2", load) is not None
+
+
+async def test_keys_are_namespaced(limiter, redis):
+    await limiter.acquire("1", history())
+
+    assert sorted(await redis.keys()) == [b"likes:{1}:loaded", b"likes:{1}:window"]
+
+
+async def test_expired_load_claim_is_taken_over(limiter, redis):
+    # Загружавший запрос упал, не дойдя до seed
+    await redis.set("likes:{1}:loaded", "dead", px=100)
+    load = history()
+
+    assert await asyncio.wait_for(limiter.acquire("1", load), timeout=2.0)
+    assert len(load.calls) == 1
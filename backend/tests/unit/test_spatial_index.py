@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.app.schemas.enums import GenderEnum
+from src.app.services import client as client_service
+from src.app.services.client import ClientService
+from src.app.utils.spatial_index import SpatialIndex
+
+pytestmark = pytest.mark.anyio
+
+MOSCOW = (55.7558, 37.6173)
+
+
+def row(client_id, latitude, longitude, gender=GenderEnum.male):
+    return SimpleNamespace(
+        id=client_id, latitude=latitude, longitude=longitude, gender=gender
+    )
+
+
+class FakeClients:
+    """Таблица клиентов, видимая синхронизации: только зафиксированные строки."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def commit(self, *rows):
+        for item in rows:
+            self.rows[item.id] = item
+
+    async def get_locations(self, after_id: int = 0) -> list:
+        return [self.rows[key] for key in sorted(self.rows) if key > after_id]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = SpatialIndex(cell_size=0.5)
+    monkeypatch.setattr(client_service, "spatial_index", index)
+    return index
+
+
+@pytest.fixture
+def uow():
+    return SimpleNamespace(client=FakeClients())
+
+
+def test_radius_query():
+    index = SpatialIndex(cell_size=0.5)
+    index.add_many(
+        [
+            row(1, 55.76, 37.62),
+            row(2, 55.80, 37.70, GenderEnum.female),
+            # ~60 км от центра Москвы
+            row(3, 56.30, 37.60),
+            row(4, 59.94, 30.31),
+            row(5, None, None),
+        ]
+    )
+
+    assert index.query(MOSCOW, 10) == [1, 2]
+    assert index.query(MOSCOW, 100) == [1, 2, 3]
+    assert index.query(MOSCOW, 10, GenderEnum.female) == [2]
+    assert index.query((0.0, 0.0), 100) == []
+
+
+def test_radius_query_across_antimeridian():
+    index = SpatialIndex(cell_size=0.5)
+    index.add_many([row(1, 65.0, 179.9), row(2, 65.0, -179.9), row(3, 65.0, 170.0)])
+
+    assert index.query((65.0, 179.95), 20) == [1, 2]
+
+
+def test_moved_client_is_reindexed():
+    index = SpatialIndex(cell_size=0.5)
+    index.add(1, *MOSCOW)
+    index.add(1, 59.94, 30.31)
+
+    assert index.query(MOSCOW, 10) == []
+    assert index.query((59.94, 30.31), 10) == [1]
+
+
+def test_local_add_does_not_advance_sync_mark():
+    index = SpatialIndex(cell_size=0.5)
+    index.add_many([row(1, *MOSCOW)])
+    # Так create добавляет клиента, зарегистрированного в этом процессе
+    index.add(10, *MOSCOW)
+
+    assert index.last_id == 1
+
+
+async def test_sync_picks_up_rows_committed_out_of_id_order(index, uow):
+    uow.client.commit(row(1, *MOSCOW), row(2, *MOSCOW))
+    await ClientService.sync_spatial_index(uow)
+
+    # id 3 выдан раньше, но его транзакция фиксируется после id 4
+    uow.client.commit(row(4, *MOSCOW))
+    index.add(5, *MOSCOW)
+    await ClientService.sync_spatial_index(uow)
+    uow.client.commit(row(3, *MOSCOW))
+    await ClientService.sync_spatial_index(uow)
+
+    assert index.query(MOSCOW, 10) == [1, 2, 3, 4, 5]
+
+
+async def test_sync_after_newer_generation(index, uow):
+    await ClientService.sync_spatial_index(uow, generation=1)
+    uow.client.commit(row(1, *MOSCOW))
+
+    assert index.is_behind(2)
+    await ClientService.sync_spatial_index(uow, generation=2)
+    assert not index.is_behind(2)
+    assert index.query(MOSCOW, 10) == [1]
+
+
+async def test_full_reload_drops_removed_rows(index, uow):
+    uow.client.commit(row(1, *MOSCOW), row(2, *MOSCOW))
+    await ClientService.sync_spatial_index(uow)
+    del uow.client.rows[2]
+
+    index.reloaded_at = 0.0
+    await ClientService.sync_spatial_index(uow)
+
+    assert index.query(MOSCOW, 10) == [1]